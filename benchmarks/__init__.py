@@ -0,0 +1,6 @@
+#  Copyright (c) 2022. Justin Vrana - All Rights Reserved
+#   You may use, distribute and modify this code under the terms of the MIT license.
+"""Benchmarks for the jdv_typecheck hot paths.
+
+Run with ``python -m benchmarks.run``. See :mod:`benchmarks.run` for options.
+"""
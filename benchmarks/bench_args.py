@@ -0,0 +1,62 @@
+#  Copyright (c) 2022. Justin Vrana - All Rights Reserved
+#   You may use, distribute and modify this code under the terms of the MIT license.
+"""Call overhead of ``validate_args``-decorated functions.
+
+Each decorated benchmark has an undecorated ``baseline`` counterpart.
+"""
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+from benchmarks.common import benchmark
+from jdv_typecheck import validate_args
+
+
+def simple(a: int, b: str):
+    ...
+
+
+def nested(a: Dict[int, Union[None, str]], b: Union[float, List[float]]):
+    ...
+
+
+def keywords(a: int, *, b: Optional[str] = None, c: float = 1.0):
+    ...
+
+
+@benchmark("validate_args/simple/baseline")
+def simple_baseline():
+    return lambda: simple(1, "s")
+
+
+@benchmark("validate_args/simple/decorated")
+def simple_decorated():
+    f = validate_args(simple)
+    return lambda: f(1, "s")
+
+
+@benchmark("validate_args/nested/baseline")
+def nested_baseline():
+    a = {1: None, 2: "s"}
+    b = [1.0, 2.0]
+    return lambda: nested(a, b)
+
+
+@benchmark("validate_args/nested/decorated")
+def nested_decorated():
+    f = validate_args(nested)
+    a = {1: None, 2: "s"}
+    b = [1.0, 2.0]
+    return lambda: f(a, b)
+
+
+@benchmark("validate_args/keywords/baseline")
+def keywords_baseline():
+    return lambda: keywords(1, b="s", c=2.0)
+
+
+@benchmark("validate_args/keywords/decorated")
+def keywords_decorated():
+    f = validate_args(keywords)
+    return lambda: f(1, b="s", c=2.0)
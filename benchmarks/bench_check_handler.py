@@ -0,0 +1,35 @@
+#  Copyright (c) 2022. Justin Vrana - All Rights Reserved
+#   You may use, distribute and modify this code under the terms of the MIT license.
+"""Per-element cost of validating a ``List[int]``.
+
+Compares validating a 10k element list with a single top-level call
+(policy resolved once, nested checks on the compiled fast path) against
+checking every element through the ``check_handler`` entry point, which
+is what nested checks used to pay.
+"""
+from typing import List
+
+from benchmarks.common import benchmark
+from jdv_typecheck import ValueChecker
+
+N = 10_000
+
+
+@benchmark("check_handler/top_level", n=N)
+def top_level():
+    check = ValueChecker(do_raise=True)
+    values = list(range(N))
+    typ = List[int]
+    return lambda: check(values, typ)
+
+
+@benchmark("check_handler/per_element", n=N)
+def per_element():
+    check = ValueChecker(do_raise=True)
+    values = list(range(N))
+
+    def run():
+        for v in values:
+            check(v, int)
+
+    return run
@@ -0,0 +1,75 @@
+#  Copyright (c) 2022. Justin Vrana - All Rights Reserved
+#   You may use, distribute and modify this code under the terms of the MIT license.
+"""Cost of rejecting values, including building and raising the error."""
+from typing import Dict
+from typing import List
+
+from benchmarks.common import benchmark
+from benchmarks.common import SIZES
+from jdv_typecheck import TypeCheckError
+from jdv_typecheck import validate_args
+from jdv_typecheck import validate_value
+from jdv_typecheck import ValueChecker
+
+
+def _raises(fn):
+    def run():
+        try:
+            fn()
+        except TypeCheckError:
+            pass
+
+    return run
+
+
+@benchmark("failure/scalar/raise")
+def scalar_raise():
+    return _raises(lambda: validate_value("str", int))
+
+
+@benchmark("failure/scalar/result")
+def scalar_result():
+    check = ValueChecker()
+    return lambda: check("str", int)
+
+
+@benchmark("failure/scalar/result_msg")
+def scalar_result_msg():
+    check = ValueChecker()
+    return lambda: check("str", int).msg
+
+
+@benchmark("failure/validate_args/raise")
+def args_raise():
+    @validate_args
+    def f(a: int, b: str):
+        ...
+
+    return _raises(lambda: f(1, 2))
+
+
+for _n in SIZES:
+
+    @benchmark(f"failure/list_int_last/{_n}", n=_n)
+    def _last(n=_n):
+        check = ValueChecker()
+        values = [*range(n - 1), "str"]
+        return lambda: check(values, List[int])
+
+    @benchmark(f"failure/list_int_all/{_n}", n=_n)
+    def _all(n=_n):
+        check = ValueChecker()
+        values = [str(i) for i in range(n)]
+        return lambda: check(values, List[int])
+
+    @benchmark(f"failure/list_int_all_fail_fast/{_n}", n=_n)
+    def _all_fail_fast(n=_n):
+        check = ValueChecker(fail_fast=True)
+        values = [str(i) for i in range(n)]
+        return lambda: check(values, List[int])
+
+    @benchmark(f"failure/large_value/{_n}", n=_n)
+    def _large_value(n=_n):
+        check = ValueChecker()
+        value = {str(i): i for i in range(n)}
+        return lambda: check(value, List[Dict[str, int]])
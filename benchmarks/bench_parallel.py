@@ -0,0 +1,46 @@
+#  Copyright (c) 2022. Justin Vrana - All Rights Reserved
+#   You may use, distribute and modify this code under the terms of the MIT license.
+"""Serial versus parallel (``ValueChecker(workers=...)``) validation.
+
+The parallel checkers use ``parallel_threshold=0`` so that every size takes
+the parallel path, which shows the size at which distributing chunks starts
+to pay off on this machine. Compare ``.../serial`` with ``.../process`` and
+``.../thread`` for each size.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from typing import List
+
+from benchmarks.common import benchmark
+from jdv_typecheck import ValueChecker
+
+PARALLEL_SIZES = (1_000, 10_000, 100_000)
+WORKERS = os.cpu_count() or 1
+
+_checkers = {}
+
+
+def _checker(kind: str) -> ValueChecker:
+    # share executors between benchmarks instead of starting a pool per setup
+    if kind not in _checkers:
+        if kind == "serial":
+            _checkers[kind] = ValueChecker()
+        elif kind == "process":
+            _checkers[kind] = ValueChecker(workers=WORKERS, parallel_threshold=0)
+        else:
+            _checkers[kind] = ValueChecker(
+                executor=ThreadPoolExecutor(WORKERS), parallel_threshold=0
+            )
+    return _checkers[kind]
+
+
+for _n in PARALLEL_SIZES:
+    for _kind in ("serial", "process", "thread"):
+
+        @benchmark(f"parallel/list_dict_list_float/{_n}/{_kind}", n=_n)
+        def _list_dict_list_float(n=_n, kind=_kind):
+            value = [{"a": [1.0, 2.0, 3.0], "b": [4.0]} for _ in range(n)]
+            check = _checker(kind)
+            typ = List[Dict[str, List[float]]]
+            return lambda: check(value, typ)
@@ -0,0 +1,86 @@
+#  Copyright (c) 2022. Justin Vrana - All Rights Reserved
+#   You may use, distribute and modify this code under the terms of the MIT license.
+"""``validate_value`` on scalars and nested payloads of increasing size, and
+``check_many`` on columns of values."""
+import dataclasses
+import typing
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from benchmarks.common import benchmark
+from benchmarks.common import SIZES
+from jdv_typecheck import validate_value
+
+
+class Point(typing.TypedDict):
+    x: int
+    y: int
+    label: Optional[str]
+
+
+@dataclasses.dataclass
+class Record:
+    x: int
+    y: int
+    label: Optional[str]
+
+
+SCALARS = {
+    "int": (1, int),
+    "str": ("str", str),
+    "any": (1, Any),
+    "optional": (None, Optional[int]),
+    "union": (1.0, Union[None, int, str, float]),
+    "wide_union": (
+        {"a": 1},
+        Union[None, int, str, float, List[int], Dict[str, Any], Tuple[int, ...]],
+    ),
+}
+
+for _name, (_value, _typ) in SCALARS.items():
+
+    @benchmark(f"validate_value/scalar/{_name}")
+    def _scalar(value=_value, typ=_typ):
+        return lambda: validate_value(value, typ)
+
+
+def _payloads(n: int):
+    yield "list_int", list(range(n)), List[int]
+    yield "list_union", [i if i % 2 else str(i) for i in range(n)], List[
+        Union[int, str]
+    ]
+    yield "tuple_ellipsis", tuple(range(n)), Tuple[int, ...]
+    yield "dict_str_int", {str(i): i for i in range(n)}, Dict[str, int]
+    yield "list_dict", [{i: None, -i: "s"} for i in range(n)], List[
+        Dict[int, Union[None, str]]
+    ]
+    yield "list_tuple", [([1.0], "s") for _ in range(n)], List[Tuple[List[float], str]]
+    yield "list_typed_dict", [{"x": i, "y": i, "label": None} for i in range(n)], List[
+        Point
+    ]
+    yield "list_dataclass", [Record(i, i, None) for i in range(n)], List[Record]
+
+
+for _n in SIZES:
+    for _name, _value, _typ in _payloads(_n):
+
+        @benchmark(f"validate_value/{_name}/{_n}", n=_n)
+        def _payload(value=_value, typ=_typ):
+            return lambda: validate_value(value, typ)
+
+
+for _n in SIZES:
+
+    @benchmark(f"check_many/int/{_n}", n=_n)
+    def _check_many_int(values=list(range(_n))):
+        return lambda: validate_value.check_many(values, int)
+
+    @benchmark(f"check_many/typed_dict/{_n}", n=_n)
+    def _check_many_typed_dict(
+        values=[{"x": i, "y": i, "label": None} for i in range(_n)]
+    ):
+        return lambda: validate_value.check_many(values, Point)
@@ -0,0 +1,38 @@
+#  Copyright (c) 2022. Justin Vrana - All Rights Reserved
+#   You may use, distribute and modify this code under the terms of the MIT license.
+from typing import Callable
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    n: Optional[int] = None  # number of elements validated per call
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, n: Optional[int] = None):
+    """Register a benchmark.
+
+    The decorated function is called once to build the callable that is
+    timed, so any payload construction stays out of the measurement.
+
+    :param name: unique, '/'-separated name of the benchmark
+    :param n: number of elements validated per call, used to report
+        per-element cost
+    """
+
+    def wrapped(setup: Callable[[], Callable[[], object]]):
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark '{name}' is already registered")
+        BENCHMARKS[name] = Benchmark(name, setup, n)
+        return setup
+
+    return wrapped
+
+
+SIZES = (10, 1_000, 100_000)
@@ -0,0 +1,134 @@
+#  Copyright (c) 2022. Justin Vrana - All Rights Reserved
+#   You may use, distribute and modify this code under the terms of the MIT license.
+"""Run the benchmark suite.
+
+Usage::
+
+    python -m benchmarks.run                         # run everything
+    python -m benchmarks.run -k validate_args        # only matching names
+    python -m benchmarks.run --json results.json     # save results
+    python -m benchmarks.run --compare results.json  # compare to saved results
+
+Each benchmark is timed with :mod:`timeit`: the number of calls per
+repeat is calibrated with ``Timer.autorange`` and the best of ``--repeat``
+repeats is reported, along with the median. Results saved with ``--json``
+include interpreter and git metadata so runs can be compared across
+commits.
+"""
+import argparse
+import datetime
+import importlib
+import json
+import pkgutil
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from os.path import dirname
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import benchmarks
+from benchmarks.common import Benchmark
+from benchmarks.common import BENCHMARKS
+
+
+def load_benchmarks() -> Dict[str, Benchmark]:
+    for module in pkgutil.iter_modules([dirname(benchmarks.__file__)]):
+        if module.name.startswith("bench_"):
+            importlib.import_module(f"benchmarks.{module.name}")
+    return BENCHMARKS
+
+
+def time_benchmark(bench: Benchmark, repeat: int) -> dict:
+    fn = bench.setup()
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    times = [t / number * 1e9 for t in timer.repeat(repeat=repeat, number=number)]
+    result = {
+        "best_ns": min(times),
+        "median_ns": statistics.median(times),
+        "number": number,
+        "repeat": repeat,
+    }
+    if bench.n:
+        result["n"] = bench.n
+        result["per_element_ns"] = result["best_ns"] / bench.n
+    return result
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=dirname(dirname(benchmarks.__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def metadata() -> dict:
+    return {
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "commit": git_revision(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def format_ns(ns: float) -> str:
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f} {unit}"
+    return f"{ns:.1f} ns"
+
+
+def report(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None):
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        line = f"{name:<{width}}  {format_ns(result['best_ns']):>10}"
+        if "per_element_ns" in result:
+            line += f"  {format_ns(result['per_element_ns']):>10}/elem"
+        else:
+            line += " " * 17
+        if baseline and name in baseline:
+            ratio = result["best_ns"] / baseline[name]["best_ns"]
+            line += f"  {ratio:6.2f}x baseline"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", "--filter", default="", help="substring of names")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="compare to results in this file")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    for name, bench in load_benchmarks().items():
+        if args.filter in name:
+            results[name] = time_benchmark(bench, args.repeat)
+    if not results:
+        parser.error(f"No benchmarks match '{args.filter}'")
+    report(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
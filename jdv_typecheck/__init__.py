@@ -1,26 +1,43 @@
 #  Copyright (c) 2022. Justin Vrana - All Rights Reserved
 #   You may use, distribute and modify this code under the terms of the MIT license.
-from jdv_typecheck.check import check_value
-from jdv_typecheck.check import checker
-from jdv_typecheck.check import is_any
-from jdv_typecheck.check import is_builtin_inst
-from jdv_typecheck.check import is_builtin_type
-from jdv_typecheck.check import is_empty
-from jdv_typecheck.check import is_generator
-from jdv_typecheck.check import is_generator_function
-from jdv_typecheck.check import is_generator_type
-from jdv_typecheck.check import is_instance
-from jdv_typecheck.check import is_subclass
-from jdv_typecheck.check import is_typing_type
-from jdv_typecheck.check import reraise_outside_of_stack
-from jdv_typecheck.check import TypeCheckError
-from jdv_typecheck.check import TypeCheckWarning
-from jdv_typecheck.check import validate_args
-from jdv_typecheck.check import validate_signature
-from jdv_typecheck.check import validate_value
-from jdv_typecheck.check import ValidationResult
-from jdv_typecheck.check import validator
-from jdv_typecheck.check import ValueChecker
+"""Names are loaded from :mod:`jdv_typecheck.check` on first access (PEP 562),
+so ``import jdv_typecheck`` alone doesn't import the checker."""
+# like typing.TYPE_CHECKING, without importing typing
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from jdv_typecheck.check import BatchResult
+    from jdv_typecheck.check import CacheInfo
+    from jdv_typecheck.check import CheckedGenerator
+    from jdv_typecheck.check import check_value
+    from jdv_typecheck.check import checker
+    from jdv_typecheck.check import Config
+    from jdv_typecheck.check import config
+    from jdv_typecheck.check import configure
+    from jdv_typecheck.check import is_any
+    from jdv_typecheck.check import is_builtin_inst
+    from jdv_typecheck.check import is_builtin_type
+    from jdv_typecheck.check import is_empty
+    from jdv_typecheck.check import is_generator
+    from jdv_typecheck.check import is_generator_function
+    from jdv_typecheck.check import is_generator_type
+    from jdv_typecheck.check import is_instance
+    from jdv_typecheck.check import is_iterator_type
+    from jdv_typecheck.check import is_subclass
+    from jdv_typecheck.check import is_typing_type
+    from jdv_typecheck.check import NDArray
+    from jdv_typecheck.check import NDArrayType
+    from jdv_typecheck.check import reraise_outside_of_stack
+    from jdv_typecheck.check import Sampling
+    from jdv_typecheck.check import TypeCheckError
+    from jdv_typecheck.check import TypeCheckWarning
+    from jdv_typecheck.check import validate_args
+    from jdv_typecheck.check import validate_signature
+    from jdv_typecheck.check import validate_value
+    from jdv_typecheck.check import ValidationFailure
+    from jdv_typecheck.check import ValidationResult
+    from jdv_typecheck.check import validator
+    from jdv_typecheck.check import ValueChecker
 
 __all__ = [
     "validate_value",
@@ -28,6 +45,16 @@ __all__ = [
     "ValueChecker",
     "check_value",
     "ValidationResult",
+    "ValidationFailure",
+    "Sampling",
+    "NDArray",
+    "NDArrayType",
+    "BatchResult",
+    "CacheInfo",
+    "CheckedGenerator",
+    "Config",
+    "config",
+    "configure",
     "TypeCheckError",
     "TypeCheckWarning",
     "validator",
@@ -38,6 +65,7 @@ __all__ = [
     "is_generator",
     "is_generator_function",
     "is_generator_type",
+    "is_iterator_type",
     "is_typing_type",
     "is_builtin_type",
     "is_builtin_inst",
@@ -45,3 +73,26 @@ __all__ = [
     "is_instance",
     "reraise_outside_of_stack",
 ]
+
+
+# submodules that used to be imported with the package
+_SUBMODULES = ("check",)
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        import importlib
+
+        # importing a submodule also sets it as an attribute of the package
+        return importlib.import_module(f"{__name__}.{name}")
+    if name in __all__:
+        import jdv_typecheck.check as check
+
+        value = getattr(check, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULES))
@@ -9,3 +9,7 @@ def fail_type_check():
 @validate_args
 def for_readable_error_on_function(a: int) -> float:
     ...
+
+
+def fail_validate_args():
+    for_readable_error_on_function("str")
@@ -3,16 +3,27 @@
 from __future__ import annotations
 
 import collections
+import contextlib
+import contextvars
 import functools
 import inspect
+import itertools
+import operator
+import os
+import random
 import sys
-import textwrap
 import types
 import typing
-import warnings
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from enum import Enum
+from inspect import Parameter
 from inspect import Signature
 from typing import Any
 from typing import Callable
+from typing import Hashable
 from typing import List
 from typing import NamedTuple
 from typing import Optional
@@ -21,18 +32,24 @@ from typing import Type
 from typing import TypeVar
 from typing import Union
 
-if sys.version_info > (3.9,):
-    from typing import ParamSpec, TypeAlias, Concatenate
-else:
-    from typing_extensions import ParamSpec, TypeAlias, Concatenate
+# only needed by type checkers (annotations are not evaluated at runtime),
+# which keeps typing_extensions, concurrent.futures, etc. out of the import
+if typing.TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    if sys.version_info >= (3, 10):
+        from typing import Concatenate, ParamSpec, TypeAlias
+    else:
+        from typing_extensions import Concatenate, ParamSpec, TypeAlias
+
+    P = ParamSpec("P")
+    R = TypeVar("R")
 
-P = ParamSpec("P")
-P2 = ParamSpec("P", bound=bool)
-P3 = ParamSpec("P", bound=bool)
-R = TypeVar("R")
 Types = Union[Type, Tuple[Type, ...]]
 SignatureLike = Union[Callable, Signature]
 
+_POSITIONAL_KINDS = (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD)
+
 ExceptionType: TypeAlias = TypeVar("ExceptionType", bound=Type[Exception])
 WarningType: TypeAlias = TypeVar("WarningType", bound=Type[Warning])
 
@@ -63,6 +80,67 @@ class _Nullable:
 Nullable = _Nullable()
 
 
+class NDArrayType:
+    """A NumPy array annotation, created with ``NDArray[dtype, shape]``.
+
+    ``dtype`` is anything accepted by ``numpy.dtype``, an abstract scalar
+    type such as ``numpy.floating``, or ``Any``. ``shape`` is a tuple of
+    dimensions, each an int (exact size), ``None`` (any size) or a name
+    (str or TypeVar) that must have the same size everywhere it appears.
+    """
+
+    __slots__ = ("dtype", "shape")
+
+    def __init__(self, dtype: Any = Any, shape: Optional[Tuple[Any, ...]] = None):
+        self.dtype = dtype
+        self.shape = shape
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, NDArrayType):
+            return (self.dtype, self.shape) == (other.dtype, other.shape)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((NDArrayType, self.dtype, self.shape))
+
+    def __repr__(self) -> str:
+        dtype = getattr(self.dtype, "__name__", self.dtype)
+        if self.shape is None:
+            return f"NDArray[{dtype}]"
+        dims = ", ".join(getattr(d, "__name__", str(d)) for d in self.shape)
+        if len(self.shape) == 1:
+            dims += ","
+        return f"NDArray[{dtype}, ({dims})]"
+
+    def __call__(self, *args, **kwargs):
+        # typing only accepts callables as parameters of generics before
+        # Python 3.11 (e.g. ``List[NDArray[float]]``), like its special forms
+        raise TypeError(f"Cannot instantiate {self!r}")
+
+
+class _NDArray:
+    def __getitem__(self, item) -> NDArrayType:
+        if not isinstance(item, tuple):
+            item = (item,)
+        if not 1 <= len(item) <= 2:
+            raise TypeError(
+                f"Expected NDArray[dtype] or NDArray[dtype, shape]. Found {item}"
+            )
+        shape = item[1] if len(item) == 2 else None
+        if shape is not None and not isinstance(shape, tuple):
+            shape = (shape,)
+        return NDArrayType(item[0], shape)
+
+    def __call__(self, *args, **kwargs):
+        raise TypeError("Cannot instantiate NDArray")
+
+
+NDArray = _NDArray()
+
+# struct format characters of buffers whose items are ints or floats
+_BUFFER_FORMATS = {int: frozenset("bBhHiIlLqQnN?"), float: frozenset("efd")}
+
+
 def is_builtin_type(obj: Any):
     """Return whether the provided class or type is a Python builtin type.
 
@@ -86,8 +164,15 @@ def is_builtin_inst(obj: Any):
     return is_builtin_type(type(obj))
 
 
+# ``list[int]`` (PEP 585) and ``int | None`` (PEP 604) are not typing objects
+# (these types don't exist before Python 3.9 and 3.10 respectively)
+_GenericAlias = getattr(types, "GenericAlias", None)
+_UnionType = getattr(types, "UnionType", None)
+_BUILTIN_ALIASES = tuple(t for t in (_GenericAlias, _UnionType) if t is not None)
+
+
 def is_typing_type(x: Any) -> bool:
-    return x.__class__.__module__ == typing.__name__
+    return x.__class__.__module__ == typing.__name__ or isinstance(x, _BUILTIN_ALIASES)
 
 
 is_generator_function = inspect.isgeneratorfunction
@@ -139,53 +224,580 @@ def is_generator_type(x: Any):
             return is_subclass(x.__origin__, collections.abc.Generator)
 
 
-class ValidationResult(NamedTuple):
-    valid: bool
-    msg: str
+def is_iterator_type(x: Any) -> bool:
+    """Return whether ``x`` is an ``Iterable``, ``Iterator`` or ``Generator``
+    annotation (see :meth:`ValueChecker.stream`)."""
+    return getattr(x, "__origin__", x) in (
+        collections.abc.Iterable,
+        collections.abc.Iterator,
+        collections.abc.Generator,
+    )
+
+
+class ValidationFailure(NamedTuple):
+    """A single validation failure.
+
+    The offending value is kept by reference and the message is only
+    rendered when :attr:`msg` is accessed.
+    """
+
+    value: Any = None
+    expected: Any = None
+    path: Tuple[Any, ...] = ()
+    extra_err_msg: Optional[str] = None
+    template: str = "Expected {value_type} '{value}' to be a {expected}."
+    message: Optional[str] = None
+
+    @property
+    def msg(self) -> str:
+        if self.message is None:
+            errmsg = self.template.format(
+                value_type=type(self.value), value=self.value, expected=self.expected
+            )
+        else:
+            errmsg = self.message
+        if self.extra_err_msg:
+            return "\n".join([self.extra_err_msg + " ", errmsg])
+        return "\n".join(["", errmsg])
+
+
+class ValidationResult:
+    """The result of a validation.
+
+    Failures are carried as :class:`ValidationFailure` records and the
+    message is only rendered when :attr:`msg` or :meth:`wrapped_msg` is
+    accessed, or when the result is raised. ``sampled`` is True if only a
+    sample of the elements of some container was checked (see
+    :class:`Sampling`).
+
+    It can be used like the ``(valid, msg)`` named tuple it used to be
+    (unpacking, indexing, ``_replace``, ``_asdict``, and comparing equal to
+    tuples), but it is not a ``tuple`` subclass, so that the message can be
+    rendered lazily.
+    """
+
+    __slots__ = ("valid", "failures", "sampled", "_msg")
+    _fields = ("valid", "msg")
+
+    def __init__(
+        self,
+        valid: bool,
+        msg: Optional[str] = None,
+        failures: Tuple[ValidationFailure, ...] = (),
+        sampled: bool = False,
+    ):
+        self.valid = valid
+        self._msg = msg
+        if msg and not failures:
+            failures = (ValidationFailure(message=msg),)
+        self.failures = failures
+        self.sampled = sampled
+
+    @property
+    def msg(self) -> str:
+        if self._msg is None:
+            self._msg = "\n".join([f.msg for f in self.failures]).strip()
+        return self._msg
 
     def __bool__(self) -> bool:
         return self.valid
 
+    def __iter__(self):
+        yield self.valid
+        yield self.msg
+
+    def __len__(self) -> int:
+        return 2
+
+    def __getitem__(self, index):
+        return (self.valid, self.msg)[index]
+
+    def _replace(self, **kwargs) -> ValidationResult:
+        valid = kwargs.pop("valid", self.valid)
+        msg = kwargs.pop("msg", Null)
+        if kwargs:
+            raise ValueError(f"Got unexpected field names: {list(kwargs)!r}")
+        if msg is Null:
+            return ValidationResult(valid, self._msg, self.failures, self.sampled)
+        return ValidationResult(valid, msg, sampled=self.sampled)
+
+    def _asdict(self) -> dict:
+        return {"valid": self.valid, "msg": self.msg}
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (ValidationResult, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        sampled = ", sampled=True" if self.sampled else ""
+        return (
+            f"{self.__class__.__name__}(valid={self.valid!r}, msg={self.msg!r}"
+            f"{sampled})"
+        )
+
     def combine(self, other: ValidationResult) -> ValidationResult:
-        valid = all([self.valid, other.valid])
-        if not other.valid:
-            msg = "\n".join([self.msg, other.msg])
-        else:
-            msg = self.msg
-        msg = msg.strip("\n").strip()
-        return ValidationResult(valid, msg)
+        if other.valid:
+            if other.sampled and not self.sampled:
+                return self._as_sampled()
+            return self
+        return ValidationResult(
+            False,
+            failures=self.failures + other.failures,
+            sampled=self.sampled or other.sampled,
+        )
+
+    def _as_sampled(self) -> ValidationResult:
+        return ValidationResult(self.valid, self._msg, self.failures, sampled=True)
+
+    def _limit(self, max_errors: int) -> ValidationResult:
+        """Return this result with at most ``max_errors`` failures."""
+        if len(self.failures) <= max_errors:
+            return self
+        return ValidationResult(
+            self.valid, failures=self.failures[:max_errors], sampled=self.sampled
+        )
+
+    def _at(self, key: Any) -> ValidationResult:
+        """Return this result with ``key`` prepended to each failure path."""
+        if not self.failures:
+            return self
+        failures = tuple(f._replace(path=(key, *f.path)) for f in self.failures)
+        return ValidationResult(self.valid, failures=failures, sampled=self.sampled)
 
     def wrapped_msg(self, width=250):
+        import textwrap
+
         return "\n".join(textwrap.wrap(self.msg, width=width))
 
 
+_VALID = ValidationResult(True, "")
+
+
+class BatchResult:
+    """The result of :meth:`ValueChecker.check_many`.
+
+    ``mask`` has one byte per value: 1 if the value is valid, 0 otherwise.
+    Only invalid values have a :class:`ValidationResult`, and their messages
+    are only rendered when accessed.
+    """
+
+    __slots__ = ("mask", "_results")
+
+    def __init__(self, mask: bytearray, results: typing.Dict[int, ValidationResult]):
+        self.mask = mask
+        self._results = results
+
+    @property
+    def valid(self) -> bool:
+        return not self._results
+
+    @property
+    def indices(self) -> List[int]:
+        """The indices of the invalid values, in order."""
+        return list(self._results)
+
+    def __bool__(self) -> bool:
+        return self.valid
+
+    def __len__(self) -> int:
+        return len(self.mask)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(n={len(self.mask)}, "
+            f"invalid={len(self._results)})"
+        )
+
+    def result(self, index: int) -> ValidationResult:
+        """Return the result of the value at ``index``, with ``index``
+        prepended to the paths of its failures."""
+        result = self._results.get(index)
+        if result is None:
+            if not 0 <= index < len(self.mask):
+                raise IndexError(f"index {index} out of range")
+            return _VALID
+        return result._at(index)
+
+    def messages(self) -> typing.Iterator[Tuple[int, str]]:
+        """Iterate over the ``(index, message)`` of the invalid values."""
+        for index, result in self._results.items():
+            yield index, result.msg
+
+    def select(self, values: typing.Iterable) -> typing.Iterator:
+        """Iterate over the valid values among ``values``, which must be the
+        values that were checked, in the same order."""
+        return itertools.compress(values, self.mask)
+
+
+class Sampling(NamedTuple):
+    """Check only a sample of the elements of large homogeneous containers.
+
+    Applies to ``List[T]``, ``Tuple[T, ...]`` and ``Dict[K, V]``. Containers
+    with more than ``head + tail + middle`` elements only have their first
+    ``head`` elements, last ``tail`` elements and ``middle`` randomly chosen
+    elements in between checked. The random choice is seeded with ``seed``,
+    so a sequence of checks is reproducible across runs.
+    """
+
+    head: int = 10
+    tail: int = 10
+    middle: int = 20
+    seed: Optional[int] = 0
+
+    @property
+    def size(self) -> int:
+        return self.head + self.tail + self.middle
+
+    def sampler(self) -> Callable[[int], List[int]]:
+        """Return a function mapping a container length to the sorted indices
+        to check."""
+        rng = random.Random(self.seed)
+        lock = threading.Lock()
+        head, tail, middle = self.head, self.tail, self.middle
+
+        def sample(n: int) -> List[int]:
+            # keep each draw atomic so concurrent checks see the seeded sequence
+            with lock:
+                indices = rng.sample(range(head, n - tail), middle)
+            indices.sort()
+            return [*range(head), *indices, *range(n - tail, n)]
+
+        return sample
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+_IMMUTABLE_TYPES = frozenset(
+    [int, float, complex, bool, str, bytes, type(None), type(Ellipsis)]
+)
+
+
+def _immutable_key(obj: Any) -> Optional[Hashable]:
+    """Return a cache key for a deeply immutable value, or None.
+
+    The key includes the type of every item so that values which compare
+    equal but have different types (e.g. ``1``, ``1.0`` and ``True``) do
+    not share a key.
+    """
+    typ = type(obj)
+    if typ in _IMMUTABLE_TYPES or isinstance(obj, Enum):
+        return typ, obj
+    if typ is tuple or typ is frozenset:
+        keys = []
+        for x in obj:
+            key = _immutable_key(x)
+            if key is None:
+                return None
+            keys.append(key)
+        if typ is frozenset:
+            return typ, frozenset(keys)
+        return typ, tuple(keys)
+    return None
+
+
+def _unwrap_typed_dict_annotation(annot: Any) -> Any:
+    """Strip ``Required[T]``, ``NotRequired[T]`` and ``ReadOnly[T]``."""
+    while getattr(getattr(annot, "__origin__", None), "_name", None) in (
+        "Required",
+        "NotRequired",
+        "ReadOnly",
+    ):
+        annot = annot.__args__[0]
+    return annot
+
+
+def _typed_dict_schema(typ: Any) -> Tuple[dict, frozenset]:
+    """Return the annotations and the required keys of a TypedDict.
+
+    Honors ``total=False``, ``Required`` and ``NotRequired``.
+    """
+    try:
+        annotations = typing.get_type_hints(typ)
+    except Exception:
+        # unresolvable forward references
+        annotations = dict(typ.__annotations__)
+    annotations = {k: _unwrap_typed_dict_annotation(v) for k, v in annotations.items()}
+    required = getattr(typ, "__required_keys__", None)
+    if required is None:
+        # Python 3.8
+        required = annotations.keys() if typ.__total__ else ()
+    return annotations, frozenset(required)
+
+
+_MISSING = object()
+
+
+def _has_fields(typ: type) -> bool:
+    """Return whether ``typ`` is a dataclass, NamedTuple or attrs class."""
+    return (
+        hasattr(typ, "__dataclass_fields__")
+        or (issubclass(typ, tuple) and hasattr(typ, "_fields"))
+        or hasattr(typ, "__attrs_attrs__")
+    )
+
+
+def _object_fields(typ: type) -> Optional[List[Tuple[str, Any]]]:
+    """Return the ``(name, annotation)`` fields of a dataclass, NamedTuple or
+    attrs class, or None for other classes.
+
+    Annotations are resolved with ``typing.get_type_hints``. Annotations that
+    can't be resolved (e.g. undefined forward references) are not checked.
+    """
+    if hasattr(typ, "__dataclass_fields__"):
+        # the user has already imported dataclasses
+        import dataclasses
+
+        fields = [(f.name, f.type) for f in dataclasses.fields(typ)]
+    elif issubclass(typ, tuple) and hasattr(typ, "_fields"):
+        annotations = getattr(typ, "__annotations__", {})
+        fields = [(name, annotations.get(name, Any)) for name in typ._fields]
+    elif hasattr(typ, "__attrs_attrs__"):
+        fields = [(a.name, a.type) for a in typ.__attrs_attrs__]
+    else:
+        return None
+    try:
+        hints = typing.get_type_hints(typ)
+    except Exception:
+        hints = {}
+    resolved = []
+    for name, annot in fields:
+        annot = hints.get(name, annot)
+        if annot is None or isinstance(annot, (str, typing.ForwardRef)):
+            annot = Any
+        resolved.append((name, annot))
+    return resolved
+
+
+class _PlanOptions(NamedTuple):
+    max_errors: Optional[int] = None
+    sample: Optional[Sampling] = None
+    buffers: bool = False
+    forbid_extra_keys: bool = False
+    # the plan only reports validity: it stops at the first error, but keeps
+    # the bulk checks that ``max_errors`` disables
+    probe: bool = False
+
+    def probing(self) -> "_PlanOptions":
+        """Return the options of a plan that only needs to report validity,
+        which stays bounded if ``max_errors`` was set."""
+        return self._replace(max_errors=1, probe=self.probe or not self.max_errors)
+
+
+Plan = Callable[..., ValidationResult]
+
+
+def _valid_plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+    return _VALID
+
+
+class CheckedGenerator(collections.abc.Generator):
+    """A lazy proxy that validates the items of an iterator as they stream.
+
+    Created by :meth:`ValueChecker.stream`. Each item is checked as it is
+    yielded, values passed to :meth:`send` are checked before they are
+    forwarded (except the ``None`` that starts a generator), and the return
+    value of a wrapped generator is checked when it finishes. Failures are
+    handled with the checker's raise/warn policy as they occur and are
+    collected in :attr:`result`. Only the current item is held, so streams
+    of any length are validated in constant memory (use ``max_errors`` to
+    bound the number of collected failures).
+    """
+
+    __slots__ = (
+        "_it",
+        "_yield_plan",
+        "_send_plan",
+        "_return_plan",
+        "_handle",
+        "_extra_err_msg",
+        "_max_errors",
+        "index",
+        "result",
+    )
+
+    def __init__(
+        self,
+        it: typing.Iterator,
+        yield_plan: Plan,
+        send_plan: Plan,
+        return_plan: Plan,
+        handle: Callable[[ValidationResult], ValidationResult],
+        extra_err_msg: Optional[str] = None,
+        max_errors: Optional[int] = None,
+        result: ValidationResult = _VALID,
+    ):
+        self._it = it
+        self._yield_plan = yield_plan
+        self._send_plan = send_plan
+        self._return_plan = return_plan
+        self._handle = handle
+        self._extra_err_msg = extra_err_msg
+        self._max_errors = max_errors
+        #: the number of items yielded so far
+        self.index = 0
+        #: the combined result of every check made so far
+        self.result = result
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} of {self._it!r}>"
+
+    def __next__(self) -> Any:
+        try:
+            item = next(self._it)
+        except StopIteration as e:
+            self._check_return(e)
+            raise
+        return self._check_yield(item)
+
+    def send(self, value: Any) -> Any:
+        # a just-started generator can only be sent None
+        if self._send_plan is not _valid_plan and (self.index or value is not None):
+            self._check(self._send_plan, value, "value sent to", ("send", self.index))
+        try:
+            item = self._it.send(value)
+        except StopIteration as e:
+            self._check_return(e)
+            raise
+        return self._check_yield(item)
+
+    def throw(self, *args) -> Any:
+        throw = getattr(self._it, "throw", None)
+        if throw is None:
+            return super().throw(*args)
+        try:
+            item = throw(*args)
+        except StopIteration as e:
+            self._check_return(e)
+            raise
+        return self._check_yield(item)
+
+    def close(self):
+        close = getattr(self._it, "close", None)
+        if close is not None:
+            close()
+
+    def _check_yield(self, item: Any) -> Any:
+        i = self.index
+        self.index = i + 1
+        if self._yield_plan is not _valid_plan:
+            self._check(self._yield_plan, item, f"item {i} yielded by", i)
+        return item
+
+    def _check_return(self, stop: StopIteration):
+        if self._return_plan is not _valid_plan:
+            self._check(self._return_plan, stop.value, "return value of", "return")
+
+    def _check(self, plan: Plan, value: Any, description: str, key: Any):
+        inner_result = plan(value)
+        if inner_result is _VALID:
+            return
+        if not inner_result.valid:
+            # only format the message on failure
+            msg = f"TypeError on {description} {self._it!r}."
+            if self._extra_err_msg:
+                msg = f"{self._extra_err_msg} {msg}"
+            inner_result = plan(value, msg)._at(key)
+        result = self.result.combine(inner_result)
+        if self._max_errors:
+            result = result._limit(self._max_errors)
+        self.result = result
+        if not inner_result.valid:
+            self._handle(inner_result)
+
+
+_POLICY_ATTRS = ("do_raise", "exception_type", "do_warn", "warning_type")
+
+# number of values check_many takes from its iterable at a time
+_BATCH_CHUNK_SIZE = 4096
+
+# containers whose elements can be collected in one pass without side effects
+_BULK_CONTAINERS = frozenset([list, tuple, set, frozenset, collections.deque])
+
+# bound on ValueChecker._recent_plans, for annotations built on the fly
+_MAX_RECENT_PLANS = 1024
+
+
+def _policy(checker: ValueChecker, overrides: dict) -> dict:
+    """Resolve the raise/warn policy.
+
+    Explicit ``overrides`` take precedence over the overrides of the current
+    context (see :meth:`ValueChecker.override`), which take precedence over
+    the checker's attributes.
+    """
+    context = checker._overrides.get()
+    policy = {}
+    for attr in _POLICY_ATTRS:
+        value = overrides.get(attr, Null)
+        if value is Null and context:
+            value = context.get(attr, Null)
+        policy[attr] = getattr(checker, attr) if value is Null else value
+    return policy
+
+
 def check_handler(
     f: Callable[Concatenate[ValueChecker, P], R]
 ) -> Callable[Concatenate[ValueChecker, P], R]:
     @functools.wraps(f)
     def wrapped(self: ValueChecker, *args: P.args, **kwargs: P.kwargs) -> R:
         result = f(self, *args, **kwargs)
-        handle_kwargs = {}
-        for attr in ["do_raise", "exception_type", "do_warn", "warning_type"]:
-            if attr not in kwargs or kwargs[attr] is Null:
-                handle_kwargs[attr] = getattr(self, attr)
-            else:
-                handle_kwargs[attr] = kwargs[attr]
-        return self._handle(result, **handle_kwargs)
+        if result.valid:
+            # valid results are never raised or warned, so skip resolving the policy
+            return result
+        return self._handle(result, **_policy(self, kwargs))
 
     return wrapped
 
 
-def get_signature(obj: SignatureLike):
+_signature_cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_signature(obj: SignatureLike) -> Signature:
+    """Return the signature of a callable.
+
+    Signatures are cached weakly by callable, and recomputed if the
+    callable's ``__signature__`` or ``__wrapped__`` changes. Bound methods
+    share the cached signature of their underlying function.
+
+    :param obj: a callable or a signature
+    :return: the signature
+    """
     if isinstance(obj, Signature):
-        signature = obj
-    else:
-        signature = inspect.signature(obj)
+        return obj
+    if inspect.ismethod(obj):
+        signature = get_signature(obj.__func__)
+        params = tuple(signature.parameters.values())
+        if params and params[0].kind in _POSITIONAL_KINDS:
+            return signature.replace(parameters=params[1:])
+        return inspect.signature(obj)
+    stamp = (getattr(obj, "__signature__", None), getattr(obj, "__wrapped__", None))
+    try:
+        cached = _signature_cache.get(obj)
+    except TypeError:
+        # not hashable or not weak-referenceable
+        return inspect.signature(obj)
+    if cached is not None and cached[0][0] is stamp[0] and cached[0][1] is stamp[1]:
+        return cached[1]
+    signature = inspect.signature(obj)
+    _signature_cache[obj] = (stamp, signature)
     return signature
 
 
+# filename of the argument checks generated by `validate_args`
+_GENERATED_FILE = "<jdv_typecheck validate_args>"
+
+
 def get_back_frame(
-    frame: Optional[types.FrameType] = None, ignore_files=(__file__,)
+    frame: Optional[types.FrameType] = None,
+    ignore_files=(__file__, _GENERATED_FILE),
 ) -> types.FrameType:
     if frame is None:
         frame = inspect.currentframe()
@@ -210,12 +822,170 @@ def reraise_outside_of_stack(exception: Exception):
     raise exception.with_traceback(back_tb)
 
 
-# TODO: add global config
+class Config:
+    """Process-wide switch for type checking.
+
+    ``rate`` is the fraction of calls that are checked: 0.0 turns checking
+    off, 1.0 always checks, and anything in between checks a random sample
+    of calls. It applies to functions decorated with ``validate_args`` (the
+    arguments and, if enabled, the return value of a call are checked or
+    skipped together), to :meth:`ValueChecker.check` when it raises or warns
+    on failure, e.g. ``validate_value`` (skipped checks return a valid
+    result), and to ``validate_signature`` (skipped only when off). Checks
+    that only return a result, such as ``checker`` and ``check_value``, are
+    predicates and always check.
+    When off, a decorated function costs one attribute check per call.
+
+    If ``strip`` is True while checking is off, ``validate_args`` returns
+    the decorated function untouched, so functions decorated while
+    disabled (e.g. at import time) have no overhead at all, even if
+    checking is turned on later.
+
+    The initial configuration is read from the ``JDV_TYPECHECK``
+    environment variable (``off``, ``always`` or ``sample(<rate>)``) and
+    ``JDV_TYPECHECK_STRIP`` (``1`` or ``0``). Use :func:`configure` to
+    change it at runtime.
+    """
+
+    __slots__ = ("rate", "strip")
+
+    def __init__(self, rate: float = 1.0, strip: bool = False):
+        self.rate = self._validate_rate(rate)
+        self.strip = strip
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(mode={self.mode!r}, rate={self.rate}, "
+            f"strip={self.strip})"
+        )
+
+    @staticmethod
+    def _validate_rate(rate: float) -> float:
+        if is_instance(rate, bool) or not is_instance(rate, (int, float)):
+            raise ValueError(f"rate must be a number. Found {rate!r}")
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"rate must be between 0 and 1. Found {rate}")
+        return float(rate)
+
+    @property
+    def mode(self) -> str:
+        """One of ``"off"``, ``"always"`` or ``"sample"``."""
+        if self.rate >= 1.0:
+            return "always"
+        elif self.rate:
+            return "sample"
+        return "off"
+
+    @property
+    def stripping(self) -> bool:
+        """Whether ``validate_args`` currently returns functions untouched."""
+        return self.strip and not self.rate
+
+    def configure(
+        self,
+        mode: Optional[str] = None,
+        *,
+        rate: Optional[float] = None,
+        strip: Optional[bool] = None,
+    ) -> Config:
+        """Change the configuration.
+
+        :param mode: ``"off"``, ``"always"``, ``"sample"`` (requires ``rate``)
+            or ``"sample(<rate>)"``
+        :param rate: the fraction of calls to check
+        :param strip: whether ``validate_args`` returns functions untouched
+            while checking is off
+        :return: this config
+        """
+        if mode is not None:
+            mode_rate = self._parse_mode(mode)
+            if mode_rate is None and rate is None:
+                raise ValueError(f"A rate is required for mode {mode!r}")
+            if mode_rate is not None:
+                if rate is not None and mode_rate != rate:
+                    raise ValueError(f"Mode {mode!r} does not match rate {rate}")
+                rate = mode_rate
+        if rate is not None:
+            self.rate = self._validate_rate(rate)
+        if strip is not None:
+            self.strip = bool(strip)
+        return self
+
+    @classmethod
+    def _parse_mode(cls, mode: str) -> Optional[float]:
+        """Return the rate of a mode, or None for ``"sample"`` without a
+        rate."""
+        normalized = mode.strip().lower()
+        if normalized in ("off", "0", "false", "no"):
+            return 0.0
+        elif normalized in ("always", "on", "1", "true", "yes"):
+            return 1.0
+        elif normalized == "sample":
+            return None
+        import re
+
+        match = re.fullmatch(r"sample[(:]\s*([0-9.eE+-]+)\s*\)?", normalized)
+        if match:
+            try:
+                return cls._validate_rate(float(match.group(1)))
+            except ValueError:
+                pass
+        raise ValueError(
+            f"Expected mode 'off', 'always' or 'sample(<rate>)'. Found {mode!r}"
+        )
+
+    @classmethod
+    def from_env(cls, environ: Optional[typing.Mapping[str, str]] = None) -> Config:
+        """Create a config from the ``JDV_TYPECHECK`` and
+        ``JDV_TYPECHECK_STRIP`` environment variables."""
+        if environ is None:
+            environ = os.environ
+        config = cls()
+        mode = environ.get("JDV_TYPECHECK")
+        if mode:
+            config.configure(mode)
+        strip = environ.get("JDV_TYPECHECK_STRIP")
+        if strip:
+            config.strip = strip.strip().lower() not in ("0", "false", "no", "off")
+        return config
+
+
+config = Config.from_env()
+
+
+def configure(
+    mode: Optional[str] = None,
+    *,
+    rate: Optional[float] = None,
+    strip: Optional[bool] = None,
+) -> Config:
+    """Change the process-wide type checking configuration.
+
+    See :class:`Config` and :meth:`Config.configure`.
+    """
+    return config.configure(mode, rate=rate, strip=strip)
+
+
+_random = random.random
+_perf_counter = time.perf_counter
+
+
 class ValueChecker:
     default_exception_type: ExceptionType = TypeCheckError
     default_warning_type: WarningType = TypeCheckWarning
     default_do_raise: bool = False
     default_do_warn: bool = False
+    default_fail_fast: bool = False
+    default_max_errors: Optional[int] = None
+    default_sample: Optional[Sampling] = None
+    default_buffers: bool = False
+    default_forbid_extra_keys: bool = False
+    default_cache_size: Optional[int] = None
+    default_check_returns: bool = False
+    default_workers: Optional[int] = None
+    default_executor: Optional[Executor] = None
+    default_parallel_threshold: int = 100_000
+    default_profile: bool = False
 
     def __init__(
         self,
@@ -223,11 +993,209 @@ class ValueChecker:
         exception_type: ExceptionType = default_exception_type,
         do_warn: bool = default_do_warn,
         warning_type: WarningType = default_warning_type,
+        fail_fast: bool = default_fail_fast,
+        max_errors: Optional[int] = default_max_errors,
+        sample: Union[bool, Sampling, None] = default_sample,
+        buffers: bool = default_buffers,
+        forbid_extra_keys: bool = default_forbid_extra_keys,
+        cache_size: Optional[int] = default_cache_size,
+        check_returns: bool = default_check_returns,
+        workers: Optional[int] = default_workers,
+        executor: Optional[Executor] = default_executor,
+        parallel_threshold: int = default_parallel_threshold,
+        profile: bool = default_profile,
     ):
+        """A configurable type checker.
+
+        :param do_raise: if True, raise ``exception_type`` on failed checks
+        :param exception_type: the exception type to raise
+        :param do_warn: if True, warn with ``warning_type`` on failed checks
+        :param warning_type: the warning type to warn with
+        :param fail_fast: if True, stop checking at the first invalid element.
+            Same as ``max_errors=1``.
+        :param max_errors: if provided, stop checking once this many invalid
+            elements have been found
+        :param sample: if provided, only check a sample of the elements of
+            large homogeneous containers. True uses the default
+            :class:`Sampling`.
+        :param buffers: if True, ``List[int]``, ``List[float]``,
+            ``Tuple[int, ...]`` and ``Tuple[float, ...]`` also accept
+            one-dimensional objects supporting the buffer protocol (e.g.
+            ``array.array``, ``bytes`` or NumPy arrays) whose item format
+            matches. These are checked in O(1) from the buffer's format.
+        :param forbid_extra_keys: if True, ``TypedDict`` values may not have
+            keys that are not declared on the ``TypedDict``. TypedDicts
+            declared with ``closed=True`` always forbid extra keys.
+        :param cache_size: if provided, keep an LRU cache of up to this many
+            results of :meth:`check` for deeply immutable values (ints, strs,
+            enums, and tuples/frozensets of such). See :meth:`cache_info`
+            and :meth:`cache_clear`.
+        :param check_returns: if True, functions decorated with
+            :meth:`validate_args` also validate their return values
+        :param workers: if provided, :meth:`check` validates the elements of
+            top-level ``List[T]``, ``Tuple[T, ...]`` and ``Dict[K, V]``
+            values with at least ``parallel_threshold`` elements in this many
+            chunks at once. Results are merged in element order. Nested
+            containers are checked serially within each chunk.
+        :param executor: the executor to run chunks on. Defaults to a
+            process pool (pure-Python checks are CPU bound), or a thread pool
+            on free-threaded builds of Python. With a process pool, the
+            annotation and values must be picklable; annotations that are
+            not are checked serially. Setting an executor without ``workers``
+            uses its number of workers.
+        :param parallel_threshold: the minimum number of elements of a
+            container to check in parallel. Below it, the cost of
+            distributing the chunks outweighs the gain (see
+            ``benchmarks/bench_parallel.py``).
+        :param profile: if True, record call counts, time spent, values
+            checked and failures per annotation checked with :meth:`check`
+            and per function decorated with :meth:`validate_args`. See
+            :meth:`profile_stats`. Can be toggled at any time.
+
+        A checker can be shared between threads and asyncio tasks. Its
+        caches are safe to use concurrently, and :meth:`override` changes
+        the raise/warn policy for the current thread or task only.
+        """
         self.do_raise = do_raise
         self.exception_type = exception_type
         self.do_warn = do_warn
         self.warning_type = warning_type
+        self.fail_fast = fail_fast
+        self.max_errors = self._validate_max_errors(max_errors)
+        self.sample = self._validate_sample(sample)
+        self.buffers = buffers
+        self.forbid_extra_keys = forbid_extra_keys
+        self.check_returns = check_returns
+        if workers is None and executor is not None:
+            workers = getattr(executor, "_max_workers", None) or os.cpu_count()
+        if workers is not None and (not is_instance(workers, int) or workers < 1):
+            raise ValueError(f"workers must be a positive int. Found {workers}")
+        self.workers = workers
+        self.executor = executor
+        self.parallel_threshold = parallel_threshold
+        self._owns_executor = False
+        self._executor_lock = threading.Lock()
+        self._plans = {}
+        # id(typ) -> (typ, options, plan) for the last options used with typ,
+        # which skips hashing (possibly nested) annotations on repeated checks
+        self._recent_plans = {}
+        self._default_options = None
+        # plans being compiled by the current thread, for recursive classes
+        self._compiling = threading.local()
+        self.cache_size = cache_size
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self.profile = profile
+        # "annotations"/"functions" -> key -> [calls, time, values, failures]
+        self._profile = {"annotations": {}, "functions": {}}
+        self._profile_lock = threading.Lock()
+        self._overrides = contextvars.ContextVar(
+            f"{self.__class__.__name__}_overrides_{id(self)}", default=None
+        )
+
+    @contextlib.contextmanager
+    def override(
+        self,
+        *,
+        do_raise: Union[Type[Null], bool] = Null,
+        exception_type: Union[Type[Null], ExceptionType] = Null,
+        do_warn: Union[Type[Null], bool] = Null,
+        warning_type: Union[Type[Null], WarningType] = Null,
+    ) -> typing.Iterator[ValueChecker]:
+        """Override the raise/warn policy within a ``with`` block.
+
+        The overrides are stored in a :mod:`contextvars` variable, so they
+        only apply to the current thread or asyncio task (tasks created
+        inside the block inherit them), and other users of a shared checker
+        such as ``validator`` are unaffected. Blocks can be nested, and
+        arguments passed directly to a check still take precedence.
+
+        .. code-block:: python
+
+            with validator.override(do_raise=False, do_warn=True):
+                handle(event)
+
+        :param do_raise: if True, raise ``exception_type`` on failed checks
+        :param exception_type: the exception type to raise
+        :param do_warn: if True, warn with ``warning_type`` on failed checks
+        :param warning_type: the warning type to warn with
+        :return: a context manager yielding this checker
+        """
+        overrides = dict(self._overrides.get() or {})
+        for attr, value in zip(
+            _POLICY_ATTRS, (do_raise, exception_type, do_warn, warning_type)
+        ):
+            if value is not Null:
+                overrides[attr] = value
+        token = self._overrides.set(overrides)
+        try:
+            yield self
+        finally:
+            self._overrides.reset(token)
+
+    @staticmethod
+    def _validate_max_errors(max_errors: Optional[int]) -> Optional[int]:
+        if max_errors is not None and (
+            not is_instance(max_errors, int) or max_errors < 1
+        ):
+            raise ValueError(f"max_errors must be a positive int. Found {max_errors}")
+        return max_errors
+
+    @staticmethod
+    def _validate_sample(sample: Union[bool, Sampling, None]) -> Optional[Sampling]:
+        if sample is True:
+            return Sampling()
+        if sample is None or sample is False or isinstance(sample, Sampling):
+            return sample or None
+        raise ValueError(f"sample must be a bool or Sampling. Found {sample}")
+
+    def _plan_options(
+        self,
+        fail_fast: Union[Type[Null], bool] = Null,
+        max_errors: Union[Type[Null], Optional[int]] = Null,
+        sample: Union[Type[Null], bool, Sampling, None] = Null,
+        buffers: Union[Type[Null], bool] = Null,
+        forbid_extra_keys: Union[Type[Null], bool] = Null,
+    ) -> _PlanOptions:
+        if (
+            fail_fast is Null
+            and max_errors is Null
+            and sample is Null
+            and buffers is Null
+            and forbid_extra_keys is Null
+        ):
+            # reuse the same options while the checker's attributes are
+            # unchanged, so that plans can be looked up by identity
+            state = (
+                self.fail_fast,
+                self.max_errors,
+                self.sample,
+                self.buffers,
+                self.forbid_extra_keys,
+            )
+            default = self._default_options
+            if default is None or default[0] != state:
+                default = self._default_options = (state, self._plan_options(*state))
+            return default[1]
+        if fail_fast is Null:
+            fail_fast = self.fail_fast
+        if fail_fast:
+            max_errors = 1
+        elif max_errors is Null:
+            max_errors = self.max_errors
+        else:
+            max_errors = self._validate_max_errors(max_errors)
+        if sample is Null:
+            sample = self.sample
+        else:
+            sample = self._validate_sample(sample)
+        if buffers is Null:
+            buffers = self.buffers
+        if forbid_extra_keys is Null:
+            forbid_extra_keys = self.forbid_extra_keys
+        return _PlanOptions(max_errors, sample, bool(buffers), bool(forbid_extra_keys))
 
     @staticmethod
     def _handle(
@@ -261,6 +1229,8 @@ class ValueChecker:
                 w = x.wrapped_msg()
             else:
                 w = warning_type(x.wrapped_msg())
+            import warnings
+
             warnings.warn(w)
         return x
 
@@ -278,7 +1248,18 @@ class ValueChecker:
 
     @staticmethod
     def _typ_is_typeddict(typ: Type):
-        return isinstance(typ, typing._TypedDictMeta)
+        # typing and typing_extensions each have their own TypedDict metaclass
+        return (
+            isinstance(typ, type)
+            and issubclass(typ, dict)
+            and hasattr(typ, "__total__")
+        )
+
+    def _instance_error(
+        self, obj: Any, typ: Any, extra_err_msg: Optional[str] = None
+    ) -> ValidationResult:
+        failure = ValidationFailure(obj, typ, extra_err_msg=extra_err_msg)
+        return ValidationResult(False, failures=(failure,))
 
     @check_handler
     def is_instance_of(
@@ -294,15 +1275,11 @@ class ValueChecker:
         _force_untrue: bool = False,
     ) -> ValidationResult:
         _, _, _, _ = do_raise, exception_type, do_warn, warning_type
-        errmsg = ""
-        valid = True
         if typ is typing.Any:
-            pass  # do nothing
+            return _VALID
         elif _force_untrue or not is_instance(obj, typ):
-            errmsg = f"Expected {type(obj)} '{obj}' to be a {typ}."
-            errmsg = self._create_error_msg(errmsg, extra_err_msg)
-            valid = False
-        return ValidationResult(valid, errmsg)
+            return self._instance_error(obj, typ, extra_err_msg)
+        return _VALID
 
     @check_handler
     def is_type_of(
@@ -318,15 +1295,26 @@ class ValueChecker:
         _force_untrue: bool = False,
     ) -> ValidationResult:
         _, _, _, _ = do_raise, exception_type, do_warn, warning_type
-        errmsg = ""
-        valid = True
+        return self._check_type_of(obj, typ, extra_err_msg, _force_untrue)
+
+    def _check_type_of(
+        self,
+        obj: Any,
+        typ: Types,
+        extra_err_msg: Optional[str] = None,
+        _force_untrue: bool = False,
+    ) -> ValidationResult:
         if typ is typing.Any:
-            pass  # do nothing
+            return _VALID
         elif _force_untrue or not is_subclass(obj, typ):
-            errmsg = f"Expected {obj} to be a subclass of {typ}."
-            errmsg = self._create_error_msg(errmsg, extra_err_msg)
-            valid = False
-        return ValidationResult(valid, errmsg)
+            failure = ValidationFailure(
+                obj,
+                typ,
+                extra_err_msg=extra_err_msg,
+                template="Expected {value} to be a subclass of {expected}.",
+            )
+            return ValidationResult(False, failures=(failure,))
+        return _VALID
 
     @check_handler
     def same_signature(
@@ -367,138 +1355,1220 @@ class ValueChecker:
         exception_type: Union[Type[Null], ExceptionType] = Null,
         do_warn: Union[Type[Null], bool] = Null,
         warning_type: Union[Type[Null], WarningType] = Null,
+        fail_fast: Union[Type[Null], bool] = Null,
+        max_errors: Union[Type[Null], Optional[int]] = Null,
+        sample: Union[Type[Null], bool, Sampling, None] = Null,
+        buffers: Union[Type[Null], bool] = Null,
+        forbid_extra_keys: Union[Type[Null], bool] = Null,
     ):
-        kwargs = dict(
-            extra_err_msg=extra_err_msg,
-            do_raise=do_raise,
-            do_warn=do_warn,
-            exception_type=exception_type,
-            warning_type=warning_type,
-        )
-        if is_typing_type(typ):
-            if typ.__class__ is TypeVar:
-                return ValidationResult(True, "")
-            if hasattr(typ, "__origin__"):
-                outer_typ = typ.__origin__
-                if hasattr(typ, "__args__"):
-                    if typ.__args__:
-                        if outer_typ is list:
-                            result = self.is_instance_of(obj, outer_typ, **kwargs)
-                            if result.valid:
-                                result = self._check_inner_list(
-                                    result, obj, typ, kwargs
-                                )
-                            return result
-                        elif outer_typ is tuple:
-                            result = self.is_instance_of(obj, outer_typ, **kwargs)
-                            if result.valid:
-                                result = self._check_inner_tuple(
-                                    result, obj, typ, kwargs
-                                )
-                            return result
-                        elif outer_typ is dict:
-                            result = self.is_instance_of(obj, outer_typ, **kwargs)
-                            if result.valid:
-                                result = self._check_inner_dict(
-                                    result, obj, typ, kwargs
-                                )
-                            return result
-                        elif outer_typ == typing.Union:
-                            for inner_typ in typ.__args__:
-                                result = self(
-                                    obj, inner_typ, do_raise=False, do_warn=False
-                                )
-                                if result.valid is True:
-                                    return result
-                            return ValidationResult(
-                                False, f"Value {obj} did not pass {typ}"
-                            )
-                        elif outer_typ == collections.abc.Generator:
-                            return inspect.isgenerator(obj)
-                        elif self._typ_is_callable(outer_typ):
-                            result = self.is_instance_of(obj, outer_typ, **kwargs)
-                            if result.valid:
-                                result = self._check_inner_callable(result, obj, typ)
-                            return result
-                else:
-                    return self.is_instance_of(obj, outer_typ, **kwargs)
-            elif self._typ_is_typeddict(typ):
-                result = self.is_instance_of(obj, dict, **kwargs)
-                if result.valid:
-                    result = self._check_inner_typed_dict(result, obj, typ)
-                return result
+        """Check that the object matches the provided annotation.
+
+        The annotation is compiled into a plan (see :meth:`compile`) on first
+        use and the cached plan is reused on subsequent calls.
+
+        Values are never consumed: for ``Iterable[T]`` annotations, the
+        elements of re-iterable values (lists, sets, dict views, etc.) are
+        checked, but iterators and generators are only checked to be
+        iterators. Use :meth:`stream` to check their elements lazily.
+
+        :param obj: the value to check
+        :param typ: the annotation to check against
+        :param arg: optional argument name to report in the error message
+        :param extra_err_msg: optional message to prepend to the error message
+        :param fail_fast: override the checker's ``fail_fast``
+        :param max_errors: override the checker's ``max_errors``
+        :param sample: override the checker's ``sample``
+        :param buffers: override the checker's ``buffers``
+        :param forbid_extra_keys: override the checker's ``forbid_extra_keys``
+        :return: the validation result
+        """
+        _, _ = exception_type, warning_type
+        rate = config.rate
+        if (
+            rate < 1.0
+            and self._raises_or_warns(do_raise, do_warn)
+            and (not rate or _random() >= rate)
+        ):
+            return _VALID
         if arg is not None:
             extra_msgs = [f"TypeError on argument '{arg}'."]
-            if kwargs["extra_err_msg"]:
-                extra_msgs.append(kwargs["extra_err_msg"])
-            kwargs["extra_err_msg"] = " ".join(extra_msgs)
-        return self.is_instance_of(obj, typ, **kwargs)
+            if extra_err_msg:
+                extra_msgs.append(extra_err_msg)
+            extra_err_msg = " ".join(extra_msgs)
+        options = self._plan_options(
+            fail_fast, max_errors, sample, buffers, forbid_extra_keys
+        )
+        profile = self.profile
+        if profile:
+            start = _perf_counter()
+        if self.cache_size and options.sample is None:
+            result = self._cached_check(obj, typ, options, extra_err_msg)
+        elif self.workers and options.sample is None:
+            result = self._parallel_plan(typ, options)(obj, extra_err_msg)
+        else:
+            result = self._plan(typ, options)(obj, extra_err_msg)
+        if profile:
+            self._record(
+                "annotations",
+                typ,
+                _perf_counter() - start,
+                values=_count_values(obj),
+                failures=0 if result.valid else 1,
+            )
+        return result
 
-    @check_handler
-    def __call__(
+    __call__ = check
+
+    def _raises_or_warns(
+        self,
+        do_raise: Union[Type[Null], bool] = Null,
+        do_warn: Union[Type[Null], bool] = Null,
+    ) -> bool:
+        """Return whether a failed check would raise or warn, i.e. whether it
+        is an assertion that the global :class:`Config` applies to."""
+        policy = _policy(self, dict(do_raise=do_raise, do_warn=do_warn))
+        return bool(policy["do_raise"] or policy["do_warn"])
+
+    def _cached_check(
         self,
         obj: Any,
-        typ: TypingType,
+        typ: Any,
+        options: _PlanOptions,
+        extra_err_msg: Optional[str],
+    ) -> ValidationResult:
+        key = _immutable_key(obj)
+        if key is None:
+            return self._plan(typ, options)(obj, extra_err_msg)
+        key = (key, typ, options, extra_err_msg)
+        results = self._results
+        try:
+            with self._results_lock:
+                result = results[key]
+                results.move_to_end(key)
+                self._hits += 1
+            return result
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable annotations cannot be cached
+            return self._plan(typ, options)(obj, extra_err_msg)
+        result = self._plan(typ, options)(obj, extra_err_msg)
+        with self._results_lock:
+            self._misses += 1
+            results[key] = result
+            while len(results) > self.cache_size:
+                results.popitem(last=False)
+        return result
+
+    def _report(
+        self, obj: Any, typ: Any, extra_err_msg: Optional[str] = None
+    ) -> ValidationResult:
+        """Check a value again with full diagnostics and apply the raise/warn
+        policy, regardless of the global :class:`Config`.
+
+        Used to report values that failed a fast, fail-fast plan.
+        """
+        result = self._plan(typ, self._plan_options())(obj, extra_err_msg)
+        if result.valid:
+            return result
+        return self._handle(result, **_policy(self, {}))
+
+    def _get_executor(self) -> Executor:
+        if self.executor is None:
+            with self._executor_lock:
+                if self.executor is None:
+                    from concurrent.futures import ProcessPoolExecutor
+                    from concurrent.futures import ThreadPoolExecutor
+
+                    if _gil_enabled():
+                        self.executor = ProcessPoolExecutor(self.workers)
+                    else:
+                        self.executor = ThreadPoolExecutor(self.workers)
+                    self._owns_executor = True
+        return self.executor
+
+    def shutdown(self, wait: bool = True):
+        """Shut down the executor created for parallel checks, if any.
+
+        Executors passed to the checker are left to their owner. A later
+        parallel check creates a new executor.
+        """
+        with self._executor_lock:
+            if self._owns_executor:
+                self.executor.shutdown(wait=wait)
+                self.executor = None
+                self._owns_executor = False
+
+    def _parallel_plan(self, typ: Any, options: _PlanOptions) -> Plan:
+        key = (typ, options, "parallel")
+        try:
+            return self._plans[key]
+        except KeyError:
+            return self._plans.setdefault(key, self._compile_parallel(typ, options))
+        except TypeError:
+            return self._plan(typ, options)
+
+    def _compile_parallel(self, typ: Any, options: _PlanOptions) -> Plan:
+        """Compile a plan that checks large containers in chunks on the
+        executor, falling back to the serial plan."""
+        serial = self._plan(typ, options)
+        args = getattr(typ, "__args__", None)
+        if not is_typing_type(typ) or not args:
+            return serial
+        origin = getattr(typ, "__origin__", None)
+        if origin is list or (
+            origin is tuple and len(args) == 2 and args[1] is Ellipsis
+        ):
+            args = args[:1]
+        elif origin is not dict:
+            return serial
+        if all(self._plan(annot, options) is _valid_plan for annot in args):
+            return serial
+        picklable = None
+        threshold = self.parallel_threshold
+        n_chunks = self.workers * 4
+        max_errors = options.max_errors
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            nonlocal picklable
+            if not isinstance(obj, origin) or len(obj) < max(threshold, 1):
+                return serial(obj, extra_err_msg)
+            # looked up on each call, as `shutdown` discards the executor
+            executor = self._get_executor()
+            from concurrent.futures import ProcessPoolExecutor
+
+            if not isinstance(executor, ProcessPoolExecutor):
+                check_chunk = self._check_chunk
+            else:
+                if picklable is None:
+                    picklable = _is_picklable(args)
+                if not picklable:
+                    return serial(obj, extra_err_msg)
+                check_chunk = _check_chunk
+            n = len(obj)
+            items = list(obj.items()) if origin is dict else obj
+            chunk_size = -(-n // n_chunks)
+            futures = [
+                executor.submit(
+                    check_chunk,
+                    origin,
+                    args,
+                    options,
+                    items[start : start + chunk_size],
+                    start,
+                    extra_err_msg,
+                )
+                for start in range(0, n, chunk_size)
+            ]
+            result = _VALID
+            for i, future in enumerate(futures):
+                result = result.combine(future.result())
+                if max_errors and len(result.failures) >= max_errors:
+                    for remaining in futures[i + 1 :]:
+                        remaining.cancel()
+                    return result._limit(max_errors)
+            return result
+
+        return plan
+
+    def _check_chunk(
+        self,
+        origin: type,
+        args: Tuple[Any, ...],
+        options: _PlanOptions,
+        items: Any,
+        start: int,
+        extra_err_msg: Optional[str],
+    ) -> ValidationResult:
+        """Check a chunk of the elements of a container (see
+        :meth:`_compile_parallel`).
+
+        Runs on the executor. ``items`` are ``(key, value)`` pairs for dicts
+        and elements starting at index ``start`` otherwise.
+        """
+        max_errors = options.max_errors
+        result = _VALID
+        if origin is dict:
+            key_plan, val_plan = (self._plan(annot, options) for annot in args)
+            for k, v in items:
+                for inner_result in (
+                    key_plan(k, extra_err_msg),
+                    val_plan(v, extra_err_msg),
+                ):
+                    if inner_result is not _VALID:
+                        result = result.combine(inner_result._at(k))
+                if max_errors and len(result.failures) >= max_errors:
+                    return result._limit(max_errors)
+        else:
+            inner = self._plan(args[0], options)
+            for i, inner_obj in enumerate(items, start):
+                inner_result = inner(inner_obj, extra_err_msg)
+                if inner_result is not _VALID:
+                    result = result.combine(inner_result._at(i))
+                    if max_errors and len(result.failures) >= max_errors:
+                        return result._limit(max_errors)
+        return result
+
+    def cache_info(self) -> CacheInfo:
+        """Return hit/miss statistics of the result cache."""
+        with self._results_lock:
+            return CacheInfo(
+                self._hits, self._misses, self.cache_size or 0, len(self._results)
+            )
+
+    def cache_clear(self):
+        """Clear the result cache and its statistics."""
+        with self._results_lock:
+            self._results.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def check_many(
+        self,
+        values: typing.Iterable,
+        typ: Any,
+        *,
+        extra_err_msg: Optional[str] = None,
+        fail_fast: Union[Type[Null], bool] = Null,
+        max_errors: Union[Type[Null], Optional[int]] = Null,
+        sample: Union[Type[Null], bool, Sampling, None] = Null,
+        buffers: Union[Type[Null], bool] = Null,
+        forbid_extra_keys: Union[Type[Null], bool] = Null,
+    ) -> BatchResult:
+        """Check each of many values against the same annotation.
+
+        The annotation is resolved once and values are consumed in chunks,
+        so ``values`` can be any iterable, e.g. a generator of rows. Only
+        invalid values get a :class:`ValidationResult`. Values of plain
+        classes (e.g. ``int`` or ``Optional[str]``) are checked a chunk at a
+        time by their exact type.
+
+        Results are returned rather than raised or warned, and the global
+        :class:`Config` does not apply.
+
+        .. code-block:: python
+
+            result = checker.check_many(rows, Row)
+            good_rows = list(result.select(rows))
+            for i, msg in result.messages():
+                log.warning("row %d: %s", i, msg)
+
+        :param values: the values to check
+        :param typ: the annotation to check them against
+        :param extra_err_msg: optional message to prepend to the error messages
+        :param fail_fast: override the checker's ``fail_fast`` for each value
+        :param max_errors: override the checker's ``max_errors`` for each value
+        :param sample: override the checker's ``sample``
+        :param buffers: override the checker's ``buffers``
+        :param forbid_extra_keys: override the checker's ``forbid_extra_keys``
+        :return: the mask of valid values and the results of invalid ones
+        """
+        options = self._plan_options(
+            fail_fast, max_errors, sample, buffers, forbid_extra_keys
+        )
+        plan = self._plan(typ, options)
+        classes = self._leaf_classes(typ)
+        allowed = frozenset(classes or ())
+        profile = self.profile
+        if profile:
+            start = _perf_counter()
+        mask = bytearray()
+        results = {}
+        it = iter(values)
+        offset = 0
+        while True:
+            chunk = list(itertools.islice(it, _BATCH_CHUNK_SIZE))
+            if not chunk:
+                break
+            if classes is not None:
+                # exact types in one pass, then subclasses and failures
+                chunk_mask = bytearray(map(allowed.__contains__, map(type, chunk)))
+                i = chunk_mask.find(0)
+                while i != -1:
+                    result = plan(chunk[i], extra_err_msg)
+                    if result.valid:
+                        chunk_mask[i] = 1
+                    else:
+                        results[offset + i] = result
+                    i = chunk_mask.find(0, i + 1)
+            else:
+                chunk_mask = bytearray(len(chunk))
+                for i, value in enumerate(chunk):
+                    result = plan(value, extra_err_msg)
+                    if result.valid:
+                        chunk_mask[i] = 1
+                    else:
+                        results[offset + i] = result
+            mask += chunk_mask
+            offset += len(chunk)
+        if profile:
+            self._record(
+                "annotations",
+                typ,
+                _perf_counter() - start,
+                values=offset,
+                failures=len(results),
+            )
+        return BatchResult(mask, results)
+
+    def _record(
+        self,
+        section: str,
+        key: Any,
+        elapsed: float,
+        calls: int = 1,
+        values: int = 1,
+        failures: int = 0,
+    ):
+        with self._profile_lock:
+            stats = self._profile[section]
+            try:
+                entry = stats.get(key)
+            except TypeError:
+                # unhashable annotations are recorded by name
+                key = str(key)
+                entry = stats.get(key)
+            if entry is None:
+                entry = stats[key] = [0, 0.0, 0, 0]
+            entry[0] += calls
+            entry[1] += elapsed
+            entry[2] += values
+            entry[3] += failures
+
+    def profile_stats(self) -> typing.Dict[str, typing.Dict[str, dict]]:
+        """Return a snapshot of the statistics recorded while :attr:`profile`
+        is enabled.
+
+        .. code-block:: python
+
+            {
+                "annotations": {
+                    "typing.List[int]": {
+                        "calls": 2, "time": 0.0012, "values": 2000, "failures": 0
+                    },
+                },
+                "functions": {"mymodule.handle": {...}},
+            }
+
+        For annotations, ``time`` is the time spent in :meth:`check` and
+        ``values`` counts the checked values, or their elements for
+        containers. For decorated functions, ``time`` is the time spent
+        validating arguments and return values (not running the function),
+        ``values`` counts the arguments and return values checked, and
+        ``failures`` the invalid ones.
+
+        :return: the statistics, by annotation and by function name
+        """
+        with self._profile_lock:
+            return {
+                section: {
+                    str(key): dict(
+                        calls=calls, time=elapsed, values=values, failures=failures
+                    )
+                    for key, (calls, elapsed, values, failures) in stats.items()
+                }
+                for section, stats in self._profile.items()
+            }
+
+    def profile_dump(self, fp: Optional[typing.TextIO] = None, **kwargs) -> str:
+        """Dump :meth:`profile_stats` as JSON.
+
+        :param fp: optional file to write the JSON to
+        :param kwargs: keyword arguments for ``json.dumps`` (e.g. ``indent``)
+        :return: the JSON string
+        """
+        import json
+
+        dumped = json.dumps(self.profile_stats(), **kwargs)
+        if fp is not None:
+            fp.write(dumped)
+        return dumped
+
+    def profile_clear(self):
+        """Clear the statistics recorded while :attr:`profile` is enabled."""
+        with self._profile_lock:
+            for stats in self._profile.values():
+                stats.clear()
+
+    def stream(
+        self,
+        obj: typing.Iterable,
+        typ: Any,
         *,
-        arg: Optional[str] = None,
         extra_err_msg: Optional[str] = None,
         do_raise: Union[Type[Null], bool] = Null,
         exception_type: Union[Type[Null], ExceptionType] = Null,
         do_warn: Union[Type[Null], bool] = Null,
         warning_type: Union[Type[Null], WarningType] = Null,
-    ):
-        return self.check(
-            obj=obj,
-            typ=typ,
-            arg=arg,
+        fail_fast: Union[Type[Null], bool] = Null,
+        max_errors: Union[Type[Null], Optional[int]] = Null,
+        sample: Union[Type[Null], bool, Sampling, None] = Null,
+        buffers: Union[Type[Null], bool] = Null,
+        forbid_extra_keys: Union[Type[Null], bool] = Null,
+    ) -> CheckedGenerator:
+        """Wrap an iterable in a proxy that validates its items as they are
+        consumed.
+
+        Unlike :meth:`check`, which only checks that a value is a generator,
+        the returned :class:`CheckedGenerator` checks every item yielded
+        against ``T`` for ``Iterable[T]`` and ``Iterator[T]``, and for
+        ``Generator[Y, S, R]`` also checks values passed to ``send`` against
+        ``S`` and the return value against ``R``. Nothing is consumed until
+        the proxy is iterated.
+
+        Failures are raised or warned (per the checker's policy) when the
+        offending item is reached, and are collected in the proxy's
+        ``result``. ``fail_fast``/``max_errors`` bound the collected failures.
+
+        :param obj: the iterable to wrap
+        :param typ: an ``Iterable``, ``Iterator`` or ``Generator`` annotation
+        :param extra_err_msg: optional message to prepend to error messages
+        :return: the validating proxy
+        """
+        if not is_iterator_type(typ):
+            raise TypeError(
+                f"Expected an Iterable, Iterator or Generator annotation. Found {typ}"
+            )
+        options = self._plan_options(
+            fail_fast, max_errors, sample, buffers, forbid_extra_keys
+        )
+        policy = _policy(
+            self,
+            dict(
+                do_raise=do_raise,
+                exception_type=exception_type,
+                do_warn=do_warn,
+                warning_type=warning_type,
+            ),
+        )
+        args = getattr(typ, "__args__", None) or ()
+        plans = [self._plan(annot, options) for annot in args[:3]]
+        plans += [_valid_plan] * (3 - len(plans))
+
+        result = self._plan(getattr(typ, "__origin__", typ), options)(
+            obj, extra_err_msg
+        )
+        if not result.valid:
+            self._handle(result, **policy)
+        return CheckedGenerator(
+            iter(obj),
+            *plans,
+            handle=functools.partial(self._handle, **policy),
             extra_err_msg=extra_err_msg,
-            do_raise=do_raise,
-            exception_type=exception_type,
-            do_warn=do_warn,
-            warning_type=warning_type,
+            max_errors=options.max_errors,
+            result=result,
         )
 
-    def _check_inner_dict(
-        self, result, obj: typing.Dict, typ: TypingType, kwargs: dict
-    ):
-        key_type, val_type = typ.__args__
-        for k in obj:
-            inner_result = self(k, key_type, **kwargs)
-            result = result.combine(inner_result)
-        for v in obj.values():
-            inner_result = self(v, val_type, **kwargs)
-            result = result.combine(inner_result)
-        return result
+    def compile(
+        self,
+        typ: Any,
+        *,
+        fail_fast: Union[Type[Null], bool] = Null,
+        max_errors: Union[Type[Null], Optional[int]] = Null,
+        sample: Union[Type[Null], bool, Sampling, None] = Null,
+        buffers: Union[Type[Null], bool] = Null,
+        forbid_extra_keys: Union[Type[Null], bool] = Null,
+    ) -> Plan:
+        """Compile an annotation into a reusable validation plan.
+
+        The annotation is analyzed once and turned into a tree of closures
+        that only perform the ``isinstance`` work needed to validate a value.
+        Plans are cached on the checker, so compiling the same annotation
+        again is a dictionary lookup.
+
+        The plan is called as ``plan(obj, extra_err_msg=None)`` and returns a
+        :class:`ValidationResult`. Plans never raise or warn; use :meth:`check`
+        to apply the raise/warn policy.
+
+        :param typ: the annotation to compile
+        :param fail_fast: override the checker's ``fail_fast``
+        :param max_errors: override the checker's ``max_errors``
+        :param sample: override the checker's ``sample``
+        :param buffers: override the checker's ``buffers``
+        :param forbid_extra_keys: override the checker's ``forbid_extra_keys``
+        :return: the compiled plan
+        """
+        options = self._plan_options(
+            fail_fast, max_errors, sample, buffers, forbid_extra_keys
+        )
+        return self._plan(typ, options)
+
+    def _compile_probe(self, typ: Any) -> Plan:
+        """Compile a plan that only reports whether values are valid, for
+        checks that report failures with :meth:`_report`."""
+        return self._plan(typ, self._plan_options().probing())
+
+    def _plan(self, typ: Any, options: _PlanOptions) -> Plan:
+        recent = self._recent_plans.get(id(typ))
+        if recent is not None and recent[0] is typ and recent[1] is options:
+            return recent[2]
+        key = (typ, options)
+        try:
+            plan = self._plans[key]
+        except KeyError:
+            pending = getattr(self._compiling, "plans", None)
+            if pending and key in pending:
+                # a class that refers to itself
+                return pending[key]
+            # if another thread compiled the same annotation meanwhile, keep
+            # the plan that was cached first
+            return self._plans.setdefault(key, self._compile(typ, options))
+        except TypeError:
+            # unhashable annotations cannot be cached
+            return self._compile(typ, options)
+        recent = self._recent_plans
+        if len(recent) >= _MAX_RECENT_PLANS:
+            recent.clear()
+        # holding typ keeps its id from being reused
+        recent[id(typ)] = (typ, options, plan)
+        return plan
+
+    def _compile(self, typ: Any, options: _PlanOptions) -> Plan:
+        if typ is None:
+            # typing turns None into NoneType, but ``tuple[int, None]`` doesn't
+            typ = type(None)
+        if typ is NDArray:
+            return self._compile_ndarray(NDArrayType())
+        elif isinstance(typ, NDArrayType):
+            return self._compile_ndarray(typ)
+        elif self._typ_is_typeddict(typ):
+            return self._compile_typed_dict(typ, options)
+        elif isinstance(typ, type):
+            fields = _object_fields(typ)
+            if fields:
+                return self._compile_object(typ, fields, options)
+        if is_typing_type(typ):
+            if typ.__class__ is TypeVar:
+                return _valid_plan
+            if typ.__class__ is _UnionType:
+                return self._compile_union(typ, options)
+            if hasattr(typ, "__origin__"):
+                outer_typ = typ.__origin__
+                if getattr(typ, "__args__", None):
+                    compiler = _ORIGIN_COMPILERS.get(outer_typ)
+                    if compiler is not None:
+                        return compiler(self, typ, options)
+                return self._compile_instance_of(outer_typ)
+        return self._compile_instance_of(typ)
+
+    def _compile_instance_of(self, typ: Types) -> Plan:
+        if typ is typing.Any:
+            return _valid_plan
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            # exact types are the common case, isinstance handles subclasses
+            if type(obj) is typ:
+                return _VALID
+            try:
+                if isinstance(obj, typ):
+                    return _VALID
+            except TypeError:
+                pass
+            return self._instance_error(obj, typ, extra_err_msg)
+
+        return plan
+
+    def _compile_sequence(
+        self, outer_typ: Type, inner_typ: Any, options: _PlanOptions
+    ) -> Plan:
+        """Compile a homogeneous ``List[T]`` or ``Tuple[T, ...]``."""
+        if options.buffers and inner_typ in _BUFFER_FORMATS:
+            plan = self._compile_sequence(
+                outer_typ, inner_typ, options._replace(buffers=False)
+            )
+            return self._compile_buffer(plan, outer_typ, inner_typ)
+        inner = self._plan(inner_typ, options)
+        if inner is _valid_plan:
+            return self._compile_instance_of(outer_typ)
+        if options.sample is not None:
+            return self._compile_sampled_sequence(outer_typ, inner, options)
+        max_errors = options.max_errors
+        all_leaves = self._compile_all_leaves(inner_typ, options)
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            if not isinstance(obj, outer_typ):
+                return self._instance_error(obj, outer_typ, extra_err_msg)
+            if (
+                all_leaves is not None
+                and obj.__class__ in _BULK_CONTAINERS
+                and all_leaves(obj)
+            ):
+                return _VALID
+            result = _VALID
+            for i, inner_obj in enumerate(obj):
+                inner_result = inner(inner_obj, extra_err_msg)
+                if inner_result is not _VALID:
+                    result = result.combine(inner_result._at(i))
+                    if max_errors and len(result.failures) >= max_errors:
+                        return result._limit(max_errors)
+            return result
+
+        return plan
+
+    def _compile_all_leaves(
+        self, inner_typ: Any, options: _PlanOptions
+    ) -> Optional[Callable[[typing.Iterable], bool]]:
+        """Compile a bulk check of the elements of a container against a plain
+        class, or a union of plain classes, or return None for other
+        annotations.
+
+        The check collects the distinct element types in a single pass, so
+        containers of the expected classes pass without checking each
+        element. It returns False if any element might fail, in which case
+        elements are checked one by one to report the failures.
+
+        With ``max_errors`` (but not for validity probes), rejecting a
+        container must stay bounded by the position of its first invalid
+        elements, so there is no bulk check.
+        """
+        if options.max_errors and not options.probe:
+            return None
+        classes = self._leaf_classes(inner_typ)
+        if classes is None:
+            return None
+        allowed = frozenset(classes)
+
+        def all_leaves(obj: typing.Iterable) -> bool:
+            obj_types = set(map(type, obj))
+            return obj_types <= allowed or all(
+                issubclass(obj_typ, classes) for obj_typ in obj_types
+            )
+
+        return all_leaves
+
+    def _leaf_classes(self, typ: Any) -> Optional[Tuple[type, ...]]:
+        """Return the classes of a plain class or a union of plain classes,
+        whose plan is a plain ``isinstance`` check, or None."""
+        if getattr(typ, "__origin__", None) is Union or typ.__class__ is _UnionType:
+            classes = typ.__args__
+        else:
+            classes = (typ,)
+        # custom metaclasses (ABCs, protocols, etc.) may override isinstance
+        if not all(self._is_plain_class(cls) and type(cls) is type for cls in classes):
+            return None
+        return classes
+
+    def _compile_sampled_sequence(
+        self, outer_typ: Type, inner: Plan, options: _PlanOptions
+    ) -> Plan:
+        max_errors = options.max_errors
+        size = options.sample.size
+        sampler = options.sample.sampler()
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            if not isinstance(obj, outer_typ):
+                return self._instance_error(obj, outer_typ, extra_err_msg)
+            n = len(obj)
+            sampled = n > size
+            result = _VALID
+            for i in sampler(n) if sampled else range(n):
+                inner_result = inner(obj[i], extra_err_msg)
+                if inner_result is not _VALID:
+                    result = result.combine(inner_result._at(i))
+                    if max_errors and len(result.failures) >= max_errors:
+                        result = result._limit(max_errors)
+                        break
+            if sampled:
+                return result._as_sampled()
+            return result
+
+        return plan
+
+    def _compile_buffer(self, plan: Plan, outer_typ: Type, inner_typ: Type) -> Plan:
+        """Extend a sequence plan to accept buffers with a matching format."""
+        formats = _BUFFER_FORMATS[inner_typ]
+
+        def buffer_plan(
+            obj: Any, extra_err_msg: Optional[str] = None
+        ) -> ValidationResult:
+            if isinstance(obj, outer_typ):
+                return plan(obj, extra_err_msg)
+            try:
+                with memoryview(obj) as view:
+                    fmt, ndim = view.format, view.ndim
+            except TypeError:
+                return plan(obj, extra_err_msg)
+            if ndim == 1 and fmt.lstrip("@=<>!") in formats:
+                return _VALID
+            failure = ValidationFailure(
+                obj,
+                inner_typ,
+                extra_err_msg=extra_err_msg,
+                message=f"Expected {ndim}-dimensional buffer {type(obj)} of format "
+                f"'{fmt}' to be a one-dimensional buffer of {inner_typ} items.",
+            )
+            return ValidationResult(False, failures=(failure,))
+
+        return buffer_plan
 
-    def _check_inner_tuple(self, result, obj: Tuple, typ: TypingType, kwargs: dict):
-        use_same_inner_type = False
-        inner_typ = typ.__args__[0]
-        if len(typ.__args__) >= 2 and typ.__args__[1] is Ellipsis:
-            use_same_inner_type = True
-        for i, inner_obj in enumerate(obj):
+    def _compile_ndarray(self, typ: NDArrayType) -> Plan:
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError(f"numpy is required to check {typ}") from e
+
+        ndarray = numpy.ndarray
+        dtype = typ.dtype
+        if dtype is typing.Any or dtype is None:
+            dtype_matches = None
+        else:
             try:
-                if not use_same_inner_type:
-                    inner_typ = typ.__args__[i]
-                inner_result = self(inner_obj, inner_typ, **kwargs)
-            except IndexError:
-                inner_result = self.is_instance_of(
-                    inner_obj, inner_typ, _force_untrue=True, **kwargs
+                expected = numpy.dtype(dtype)
+            except TypeError:
+                expected = None
+            if expected is None or (
+                isinstance(dtype, type)
+                and issubclass(dtype, numpy.generic)
+                and expected.type is not dtype
+            ):
+                # abstract scalar types such as numpy.floating
+                def dtype_matches(actual):
+                    return numpy.issubdtype(actual, dtype)
+
+            else:
+
+                def dtype_matches(actual):
+                    return actual == expected
+
+        if typ.shape is None:
+            shape_matches = None
+        else:
+            ndim = len(typ.shape)
+            sizes = [(i, d) for i, d in enumerate(typ.shape) if isinstance(d, int)]
+            names = [
+                (i, d)
+                for i, d in enumerate(typ.shape)
+                if d is not None and not isinstance(d, int)
+            ]
+
+            def shape_matches(actual):
+                if len(actual) != ndim:
+                    return False
+                for i, size in sizes:
+                    if actual[i] != size:
+                        return False
+                if names:
+                    seen = {}
+                    for i, name in names:
+                        if seen.setdefault(name, actual[i]) != actual[i]:
+                            return False
+                return True
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            if not isinstance(obj, ndarray):
+                return self._instance_error(obj, typ, extra_err_msg)
+            if (dtype_matches is None or dtype_matches(obj.dtype)) and (
+                shape_matches is None or shape_matches(obj.shape)
+            ):
+                return _VALID
+            failure = ValidationFailure(
+                obj,
+                typ,
+                extra_err_msg=extra_err_msg,
+                message=f"Expected array with dtype {obj.dtype} and shape "
+                f"{obj.shape} to be a {typ}.",
+            )
+            return ValidationResult(False, failures=(failure,))
+
+        return plan
+
+    def _compile_tuple(self, typ: TypingType, options: _PlanOptions) -> Plan:
+        args = typ.__args__
+        if len(args) >= 2 and args[1] is Ellipsis:
+            return self._compile_sequence(tuple, args[0], options)
+
+        inners = [self._plan(inner_typ, options) for inner_typ in args]
+        n_args = len(args)
+        max_errors = options.max_errors
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            if not isinstance(obj, tuple):
+                return self._instance_error(obj, tuple, extra_err_msg)
+            result = _VALID
+            for i, (inner, inner_obj) in enumerate(zip(inners, obj)):
+                inner_result = inner(inner_obj, extra_err_msg)
+                if inner_result is not _VALID:
+                    result = result.combine(inner_result._at(i))
+                    if max_errors and len(result.failures) >= max_errors:
+                        return result._limit(max_errors)
+            if len(obj) > n_args:
+                for i in range(n_args, len(obj)):
+                    inner_result = self._instance_error(obj[i], args[-1], extra_err_msg)
+                    result = result.combine(inner_result._at(i))
+                    if max_errors and len(result.failures) >= max_errors:
+                        return result._limit(max_errors)
+            elif len(obj) < n_args:
+                failure = ValidationFailure(
+                    obj,
+                    typ,
+                    extra_err_msg=extra_err_msg,
+                    message=f"Expected {n_args} items for {typ}, but found {len(obj)}.",
                 )
-            result = result.combine(inner_result)
-        return result
+                result = result.combine(ValidationResult(False, failures=(failure,)))
+            return result
 
-    def _check_inner_list(self, result, obj: List, typ: TypingType, kwargs: dict):
-        inner_typ = typ.__args__[0]
-        for inner_obj in obj:
-            inner_result = self(inner_obj, inner_typ, **kwargs)
-            result = result.combine(inner_result)
-        return result
+        return plan
+
+    def _compile_homogeneous_sequence(
+        self, typ: TypingType, options: _PlanOptions
+    ) -> Plan:
+        """Compile ``List[T]``, ``Sequence[T]``, ``Deque[T]``, etc."""
+        return self._compile_sequence(typ.__origin__, typ.__args__[0], options)
+
+    def _compile_collection(self, typ: TypingType, options: _PlanOptions) -> Plan:
+        """Compile ``Set[T]``, ``FrozenSet[T]``, ``Collection[T]``,
+        ``Iterable[T]``, etc.
+
+        The elements of iterators (including generators) are not checked,
+        as that would consume them. Use :meth:`stream` to check them as they
+        are consumed. Sampling does not apply, as these can't be indexed.
+        """
+        outer_typ = typ.__origin__
+        inner = self._plan(typ.__args__[0], options)
+        if inner is _valid_plan:
+            return self._compile_instance_of(outer_typ)
+        max_errors = options.max_errors
+        all_leaves = self._compile_all_leaves(typ.__args__[0], options)
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            if not isinstance(obj, outer_typ):
+                return self._instance_error(obj, outer_typ, extra_err_msg)
+            if isinstance(obj, collections.abc.Iterator):
+                return _VALID
+            if (
+                all_leaves is not None
+                and obj.__class__ in _BULK_CONTAINERS
+                and all_leaves(obj)
+            ):
+                return _VALID
+            result = _VALID
+            for i, inner_obj in enumerate(obj):
+                inner_result = inner(inner_obj, extra_err_msg)
+                if inner_result is not _VALID:
+                    result = result.combine(inner_result._at(i))
+                    if max_errors and len(result.failures) >= max_errors:
+                        return result._limit(max_errors)
+            return result
+
+        return plan
+
+    def _compile_dict(self, typ: TypingType, options: _PlanOptions) -> Plan:
+        """Compile ``Dict[K, V]``, ``Mapping[K, V]``, ``Counter[K]``, etc."""
+        outer_typ = typ.__origin__
+        if outer_typ is collections.Counter:
+            key_type, val_type = typ.__args__[0], int
+        else:
+            key_type, val_type = typ.__args__
+        key_plan = self._plan(key_type, options)
+        val_plan = self._plan(val_type, options)
+        if key_plan is _valid_plan and val_plan is _valid_plan:
+            return self._compile_instance_of(outer_typ)
+        if options.sample is not None:
+            return self._compile_sampled_dict(outer_typ, key_plan, val_plan, options)
+        max_errors = options.max_errors
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            if not isinstance(obj, outer_typ):
+                return self._instance_error(obj, outer_typ, extra_err_msg)
+            result = _VALID
+            if key_plan is not _valid_plan:
+                for k in obj:
+                    inner_result = key_plan(k, extra_err_msg)
+                    if inner_result is not _VALID:
+                        result = result.combine(inner_result._at(k))
+                        if max_errors and len(result.failures) >= max_errors:
+                            return result._limit(max_errors)
+            if val_plan is not _valid_plan:
+                for k, v in obj.items():
+                    inner_result = val_plan(v, extra_err_msg)
+                    if inner_result is not _VALID:
+                        result = result.combine(inner_result._at(k))
+                        if max_errors and len(result.failures) >= max_errors:
+                            return result._limit(max_errors)
+            return result
+
+        return plan
+
+    def _compile_sampled_dict(
+        self, outer_typ: Type, key_plan: Plan, val_plan: Plan, options: _PlanOptions
+    ) -> Plan:
+        max_errors = options.max_errors
+        size = options.sample.size
+        sampler = options.sample.sampler()
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            if not isinstance(obj, outer_typ):
+                return self._instance_error(obj, outer_typ, extra_err_msg)
+            n = len(obj)
+            sampled = n > size
+            if sampled:
+                # dicts can't be indexed by position, but copying the keys
+                # is a single C-level pass
+                keys = list(obj)
+                keys = [keys[i] for i in sampler(n)]
+            else:
+                keys = obj
+            result = _VALID
+            for k in keys:
+                for inner_result in (
+                    key_plan(k, extra_err_msg),
+                    val_plan(obj[k], extra_err_msg),
+                ):
+                    if inner_result is not _VALID:
+                        result = result.combine(inner_result._at(k))
+                if max_errors and len(result.failures) >= max_errors:
+                    result = result._limit(max_errors)
+                    break
+            if sampled:
+                return result._as_sampled()
+            return result
+
+        return plan
+
+    def _compile_union(self, typ: TypingType, options: _PlanOptions) -> Plan:
+        """Compile ``Union[...]``.
+
+        Members that are plain classes are checked with a single
+        ``isinstance`` against all of them. The other members are only tried
+        if the value is an instance of their class (e.g. ``list`` for
+        ``List[int]``), which is looked up once per ``type(obj)``.
+        """
+        # branches only need to report validity, so stop at their first error
+        branch_options = options.probing()
+        inners = [self._plan(inner_typ, branch_options) for inner_typ in typ.__args__]
+        if _valid_plan in inners:
+            return _valid_plan
+        classes = []
+        branches = []
+        for inner_typ, inner in zip(typ.__args__, inners):
+            if self._is_plain_class(inner_typ):
+                classes.append(inner_typ)
+            else:
+                branches.append((self._union_branch_class(inner_typ), inner))
+        classes = tuple(classes)
+        # type(obj) -> the branches that obj could pass
+        candidates = {}
+
+        def branches_for(obj_typ: type) -> List[Plan]:
+            plans = []
+            for cls, inner in branches:
+                try:
+                    if cls is None or issubclass(obj_typ, cls):
+                        plans.append(inner)
+                except TypeError:
+                    plans.append(inner)
+            return candidates.setdefault(obj_typ, plans)
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            try:
+                if isinstance(obj, classes):
+                    return _VALID
+            except TypeError:
+                # e.g. a Protocol that isn't runtime checkable
+                if any(is_instance(obj, cls) for cls in classes):
+                    return _VALID
+            obj_typ = type(obj)
+            plans = candidates.get(obj_typ)
+            if plans is None:
+                plans = branches_for(obj_typ)
+            for inner in plans:
+                inner_result = inner(obj)
+                if inner_result.valid:
+                    return inner_result
+            failure = ValidationFailure(
+                obj,
+                typ,
+                extra_err_msg=extra_err_msg,
+                template="Value {value} did not pass {expected}",
+            )
+            return ValidationResult(False, failures=(failure,))
+
+        return plan
+
+    def _is_plain_class(self, typ: Any) -> bool:
+        """Return whether the plan of ``typ`` is just an ``isinstance`` check."""
+        # ``list[int]`` passes isinstance(typ, type) before Python 3.11
+        return (
+            isinstance(typ, type)
+            and not isinstance(typ, _BUILTIN_ALIASES)
+            and not self._typ_is_typeddict(typ)
+            and not _has_fields(typ)
+        )
+
+    def _union_branch_class(self, typ: Any) -> Optional[type]:
+        """Return the class that values must be instances of to pass ``typ``,
+        or None if there is no such class."""
+        if self._typ_is_typeddict(typ):
+            return dict
+        if isinstance(typ, type) and not isinstance(typ, _BUILTIN_ALIASES):
+            return typ
+        origin = getattr(typ, "__origin__", None)
+        if isinstance(origin, type):
+            return origin
+        return None
+
+    def _compile_generator(self, typ: TypingType) -> Plan:
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            if inspect.isgenerator(obj):
+                return _VALID
+            failure = ValidationFailure(
+                obj,
+                typ,
+                extra_err_msg=extra_err_msg,
+                template="Expected {value_type} '{value}' to be a generator.",
+            )
+            return ValidationResult(False, failures=(failure,))
+
+        return plan
+
+    def _compile_callable(self, typ: TypingType) -> Plan:
+        outer_typ = typ.__origin__
+        # callable -> (signature, result), invalidated when the signature changes
+        results = weakref.WeakKeyDictionary()
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            if not isinstance(obj, outer_typ):
+                return self._instance_error(obj, outer_typ, extra_err_msg)
+            try:
+                signature = get_signature(obj)
+                cached = results.get(obj)
+            except (TypeError, ValueError):
+                return self._check_inner_callable(_VALID, obj, typ)
+            if cached is not None and cached[0] is signature:
+                return cached[1]
+            result = self._check_inner_callable(_VALID, obj, typ)
+            results[obj] = (signature, result)
+            return result
+
+        return plan
+
+    def _compile_typed_dict(self, typ: TypingType, options: _PlanOptions) -> Plan:
+        annotations, required = _typed_dict_schema(typ)
+        expected_keys = list(annotations.keys())
+        forbid_extra_keys = options.forbid_extra_keys or getattr(
+            typ, "__closed__", False
+        )
+        # key -> (plan, error message), built once for the whole schema
+        inners = {
+            k: (self._plan(annot, options), f"TypeError on key '{k}'.")
+            for k, annot in annotations.items()
+        }
+        missing_failures = {
+            k: ValidationFailure(
+                expected=typ,
+                path=(k,),
+                message=f"Key '{k}' missing on TypedDict {typ}. "
+                f"Expected keys {expected_keys}",
+            )
+            for k in required
+        }
+        max_errors = options.max_errors
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            if not isinstance(obj, dict):
+                return self._instance_error(obj, dict, extra_err_msg)
+            result = _VALID
+            missing = required - obj.keys()
+            if missing:
+                failures = tuple(
+                    missing_failures[k] for k in expected_keys if k in missing
+                )
+                result = ValidationResult(False, failures=failures)
+                if max_errors and len(failures) >= max_errors:
+                    return result._limit(max_errors)
+            for k, v in obj.items():
+                try:
+                    inner, key_err_msg = inners[k]
+                except KeyError:
+                    if not forbid_extra_keys:
+                        continue
+                    inner_result = ValidationResult(
+                        False,
+                        failures=(
+                            ValidationFailure(
+                                v,
+                                typ,
+                                path=(k,),
+                                message=f"Unexpected key '{k}' on TypedDict {typ}. "
+                                f"Expected keys {expected_keys}",
+                            ),
+                        ),
+                    )
+                else:
+                    inner_result = inner(v, key_err_msg)
+                    if inner_result is _VALID:
+                        continue
+                    inner_result = inner_result._at(k)
+                result = result.combine(inner_result)
+                if max_errors and len(result.failures) >= max_errors:
+                    return result._limit(max_errors)
+            return result
+
+        return plan
+
+    def _compile_object(
+        self, typ: type, fields: List[Tuple[str, Any]], options: _PlanOptions
+    ) -> Plan:
+        """Compile a dataclass, NamedTuple or attrs class into a plan that
+        checks the instance's fields."""
+        names = [name for name, _ in fields]
+        # a NamedTuple's values are its items, otherwise fetch all the
+        # attributes in one call
+        if issubclass(typ, tuple):
+            get_values = tuple
+        elif len(names) == 1:
+            name = names[0]
+
+            def get_values(obj):
+                return (getattr(obj, name, _MISSING),)
+
+        else:
+            getter = operator.attrgetter(*names)
+
+            def get_values(obj):
+                try:
+                    return getter(obj)
+                except AttributeError:
+                    # e.g. a dataclass field with init=False that is not set yet
+                    return tuple(getattr(obj, n, _MISSING) for n in names)
+
+        inners = []
+        max_errors = options.max_errors
+
+        def plan(obj: Any, extra_err_msg: Optional[str] = None) -> ValidationResult:
+            if not isinstance(obj, typ):
+                return self._instance_error(obj, typ, extra_err_msg)
+            result = _VALID
+            for (name, inner, attr_err_msg), value in zip(inners, get_values(obj)):
+                if value is _MISSING:
+                    continue
+                inner_result = inner(value, attr_err_msg)
+                if inner_result is not _VALID:
+                    result = result.combine(inner_result._at(name))
+                    if max_errors and len(result.failures) >= max_errors:
+                        return result._limit(max_errors)
+            return result
+
+        # register the plan before compiling the fields, so fields that refer
+        # to the class itself (e.g. List["Node"]) use it
+        pending = self._compiling.__dict__.setdefault("plans", {})
+        key = (typ, options)
+        pending[key] = plan
+        try:
+            for name, annot in fields:
+                inner = self._plan(annot, options)
+                inners.append((name, inner, f"TypeError on attribute '{name}'."))
+        finally:
+            del pending[key]
+        if all(inner is _valid_plan for _, inner, _ in inners):
+            return self._compile_instance_of(typ)
+        return plan
 
     def _check_inner_callable(self, result, obj: Callable, typ: TypingType):
         if typ.__args__:
             arg_annots = typ.__args__[:-1]
             ret_annot = typ.__args__[-1]
-            signature = inspect.signature(obj)
+            signature = get_signature(obj)
             signature_params = list(signature.parameters.values())
             signature_ret = signature.return_annotation
             if not len(signature_params) == len(arg_annots):
@@ -511,13 +2581,16 @@ class ValueChecker:
                 )
             else:
                 for param, annot in zip(signature_params, arg_annots):
-                    inner_result = self.is_type_of(
-                        param.annotation,
-                        annot,
-                        extra_err_msg=f"TypeError on arg '{param}'. ",
-                    )
-                    result = result.combine(inner_result)
-                inner_result = self.is_type_of(
+                    inner_result = self._check_type_of(param.annotation, annot)
+                    if not inner_result.valid:
+                        # only format the parameter message on failure
+                        inner_result = self._check_type_of(
+                            param.annotation,
+                            annot,
+                            extra_err_msg=f"TypeError on arg '{param}'. ",
+                        )
+                        result = result.combine(inner_result)
+                inner_result = self._check_type_of(
                     signature_ret,
                     ret_annot,
                     extra_err_msg="TypeError on return type. ",
@@ -538,62 +2611,523 @@ class ValueChecker:
             result = outer_result.combine(result)
         return result
 
-    def _check_inner_typed_dict(self, result, obj: Callable, typ: TypingType):
-        annotations = typ.__annotations__
-        for k, annot in annotations.items():
-            if k not in obj:
-                result = result.combine(
-                    ValidationResult(
-                        valid=False,
-                        msg=f"Key '{k}' missing on TypedDict {typ}. "
-                        f"Expected keys {list(annotations.keys())}",
-                    )
-                )
-            else:
-                result = result.combine(
-                    self.check(obj[k], annot, extra_err_msg=f"TypeError on key '{k}'.")
-                )
-        return result
-
     def validate_signature(self, other: SignatureLike):
         def wrapped(f: Callable) -> Callable:
-            self.same_signature(f, other)
+            if config.rate:
+                self.same_signature(f, other)
             return f
 
         return wrapped
 
-    def validate_args(self, x: Union[str, Callable], *others: str) -> Callable:
-        if isinstance(x, str):
-            return functools.partial(self._validate_args, only=[x, *others])
+    def validate_args(
+        self,
+        x: Union[str, Callable, None] = None,
+        *others: str,
+        returns: Union[Type[Null], bool] = Null,
+    ) -> Callable:
+        """Decorate a function to validate its arguments against its
+        annotations on every call.
+
+        Annotations are compiled once, when the function is decorated. Use as
+        ``@validate_args``, ``@validate_args("a", "b")`` to only validate
+        the named arguments, or ``@validate_args(returns=True)``.
+
+        :param x: the function to decorate, or the name of an argument to
+            validate
+        :param others: names of more arguments to validate
+        :param returns: override the checker's ``check_returns``. If True,
+            also validate the return value against the return annotation
+            (for generator functions, each yielded item, sent value and the
+            return value; see :meth:`stream`)
+        :return: the decorated function, or a decorator
+        """
+        if x is None:
+            return functools.partial(self._validate_args, returns=returns)
+        elif isinstance(x, str):
+            return functools.partial(
+                self._validate_args, only=[x, *others], returns=returns
+            )
         else:
-            return self._validate_args(x)
+            return self._validate_args(x, returns=returns)
 
-    def _validate_args(self, f: Callable, only=None) -> Callable:
-        signature: inspect.Signature = inspect.signature(f)
+    def _validate_args(
+        self, f: Callable, only=None, returns: Union[Type[Null], bool] = Null
+    ) -> Callable:
+        if config.stripping:
+            return f
+        signature: inspect.Signature = get_signature(f)
         checker = self
+        if returns is Null:
+            returns = self.check_returns
         frame = get_back_frame()
-        frameinfo = inspect.getframeinfo(frame)
+        location = f"{frame.f_code.co_filename}:{frame.f_lineno}"
+
+        # positional index -> parameter, and name -> parameter for keyword
+        # arguments, built once at decoration time
+        (
+            positional,
+            keyword,
+            var_positional,
+            var_keyword,
+            n_positional,
+        ) = self._compile_parameters(signature, only)
+        name = _function_name(f)
+
+        def fail(p: inspect.Parameter, pvalue: Any):
+            if checker.profile:
+                checker._record("functions", name, 0.0, calls=0, values=0, failures=1)
+            # the error message is only built when validation fails
+            msg = (
+                f"Argument error for `{p}` for function `{f.__name__}` " f"({location})"
+            )
+            checker._report(pvalue, p.annotation, msg)
 
-        @functools.wraps(f)
-        def wrapped(*args, **kwargs):
-            bound_args = signature.bind(*args, **kwargs)
-            params_list = list(bound_args.signature.parameters.values())
-            for p in params_list:
-                if only and p.name not in only:
-                    continue
-                if p.annotation and not is_empty(p.annotation):
+        parameters = (positional, keyword, var_positional, var_keyword, n_positional)
+        unprofiled = self._compile_check_args(*parameters, fail)
+
+        def profiled(args: tuple, kwargs: dict):
+            start = _perf_counter()
+            try:
+                unprofiled(args, kwargs)
+            finally:
+                checker._record(
+                    "functions",
+                    name,
+                    _perf_counter() - start,
+                    values=len(args) + len(kwargs),
+                )
+
+        check_args = self._compile_check_args(*parameters, fail, profiled)
+
+        if inspect.iscoroutinefunction(f):
+            return self._validate_coroutine(f, signature, location, check_args, returns)
+        elif inspect.isasyncgenfunction(f):
+            return self._validate_async_generator(
+                f, signature, location, check_args, returns
+            )
+        return self._validate_function(f, signature, location, check_args, returns)
+
+    def _compile_parameters(self, signature: Signature, only=None) -> tuple:
+        """Compile the plans of the parameters of a signature.
+
+        Each parameter is compiled to ``(parameter, classes, plan)``, where
+        ``classes`` is the class (or tuple of classes) that arguments must be
+        instances of if the parameter is annotated with a plain class (or a
+        union of plain classes), and None otherwise.
+
+        :return: the ``(index, parameter, classes, plan)`` of positional
+            parameters, name -> ``(parameter, classes, plan)`` for keyword
+            arguments, the ``(parameter, classes, plan)`` of ``*args`` and
+            ``**kwargs`` (or None), and the number of positional parameters
+        """
+        positional = []
+        keyword = {}
+        var_positional = None
+        var_keyword = None
+        n_positional = 0
+        for p in signature.parameters.values():
+            compiled = (p, None, None)
+            if only and p.name not in only:
+                pass
+            elif p.annotation and not is_empty(p.annotation):
+                # only validity is needed here, failures are re-checked in `fail`
+                plan = self._compile_probe(p.annotation)
+                if plan is not _valid_plan:
+                    classes = self._leaf_classes(p.annotation)
+                    if classes is not None and len(classes) == 1:
+                        classes = classes[0]
+                    compiled = (p, classes, plan)
+            checked = compiled[2] is not None
+            if p.kind is p.VAR_POSITIONAL:
+                if checked:
+                    var_positional = compiled
+            elif p.kind is p.VAR_KEYWORD:
+                if checked:
+                    var_keyword = compiled
+            else:
+                if p.kind is not p.KEYWORD_ONLY:
+                    if checked:
+                        positional.append((n_positional, *compiled))
+                    n_positional += 1
+                if p.kind is not p.POSITIONAL_ONLY:
+                    keyword[p.name] = compiled
+        return positional, keyword, var_positional, var_keyword, n_positional
+
+    def _compile_check_args(
+        self,
+        positional: list,
+        keyword: dict,
+        var_positional: Optional[tuple],
+        var_keyword: Optional[tuple],
+        n_positional: int,
+        fail: Callable[[Parameter, Any], None],
+        profiled: Optional[Callable[[tuple, dict], None]] = None,
+    ) -> Callable[[tuple, dict], None]:
+        """Generate the function checking the ``(args, kwargs)`` of a call
+        (see :meth:`_compile_parameters`).
+
+        Positional arguments are checked by straight-line code, with plain
+        classes checked inline (``type(v) is cls or isinstance(v, cls)``), so
+        that simple signatures cost little more than an undecorated call.
+        Plans are only called for other annotations. If ``profiled`` is
+        provided, calls are delegated to it while profiling is enabled.
+        """
+
+        def valid(compiled: tuple, value: Any) -> bool:
+            _, classes, plan = compiled
+            if classes is not None:
+                return isinstance(value, classes)
+            return plan(value).valid
+
+        def check_var_args(values: tuple):
+            for value in values:
+                if not valid(var_positional, value):
+                    fail(var_positional[0], value)
+
+        def check_kwargs(kwargs: dict):
+            for key, value in kwargs.items():
+                compiled = keyword.get(key, var_keyword)
+                if compiled is not None and compiled[2] is not None:
+                    if not valid(compiled, value):
+                        fail(compiled[0], value)
+
+        namespace = dict(
+            checker=self,
+            profiled=profiled,
+            fail=fail,
+            check_var_args=check_var_args,
+            check_kwargs=check_kwargs,
+        )
+        lines = ["def check_args(args, kwargs):"]
+        if profiled is not None:
+            lines += [
+                "    if checker.profile:",
+                "        return profiled(args, kwargs)",
+            ]
+        lines.append("    n_args = len(args)")
+        for i, p, classes, plan in positional:
+            namespace[f"p{i}"] = p
+            if isinstance(classes, type):
+                namespace[f"c{i}"] = classes
+                invalid = f"type(v) is not c{i} and not isinstance(v, c{i})"
+            elif classes is not None:
+                namespace[f"c{i}"] = classes
+                invalid = f"not isinstance(v, c{i})"
+            else:
+                namespace[f"plan{i}"] = plan
+                invalid = f"not plan{i}(v).valid"
+            lines += [
+                f"    if n_args > {i}:",
+                f"        v = args[{i}]",
+                f"        if {invalid}:",
+                f"            fail(p{i}, v)",
+            ]
+        if var_positional is not None:
+            lines += [
+                f"    if n_args > {n_positional}:",
+                f"        check_var_args(args[{n_positional}:])",
+            ]
+        if var_keyword is not None or any(c[2] for c in keyword.values()):
+            lines += ["    if kwargs:", "        check_kwargs(kwargs)"]
+        code = compile("\n".join(lines), _GENERATED_FILE, "exec")
+        exec(code, namespace)
+        return namespace["check_args"]
+
+    def _validate_function(
+        self,
+        f: Callable,
+        signature: Signature,
+        location: str,
+        check_args: Callable[[tuple, dict], None],
+        returns: bool,
+    ) -> Callable:
+        annotation = signature.return_annotation
+        if returns and inspect.isgeneratorfunction(f) and is_iterator_type(annotation):
+            msg = f"Return value error for function `{f.__name__}` ({location})"
+
+            @functools.wraps(f)
+            def wrapped(*args, **kwargs):
+                rate = config.rate
+                if rate < 1.0 and (not rate or _random() >= rate):
+                    return f(*args, **kwargs)
+                check_args(args, kwargs)
+                return self.stream(f(*args, **kwargs), annotation, extra_err_msg=msg)
+
+            return wrapped
+
+        check_return = None
+        if returns:
+            check_return = self._return_checker(f, annotation, location, "Return value")
+
+        if check_return is None:
+
+            @functools.wraps(f)
+            def wrapped(*args, **kwargs):
+                # skipped calls (see `Config`) cost one attribute check
+                rate = config.rate
+                if rate < 1.0 and (not rate or _random() >= rate):
+                    return f(*args, **kwargs)
+                check_args(args, kwargs)
+                return f(*args, **kwargs)
+
+        else:
+
+            @functools.wraps(f)
+            def wrapped(*args, **kwargs):
+                rate = config.rate
+                if rate < 1.0 and (not rate or _random() >= rate):
+                    return f(*args, **kwargs)
+                check_args(args, kwargs)
+                result = f(*args, **kwargs)
+                check_return(result)
+                return result
+
+        return wrapped
+
+    def _return_checker(
+        self, f: Callable, annotation: Any, location: str, description: str
+    ) -> Optional[Callable[[Any], None]]:
+        """Compile a checker for values produced by ``f``, or return None if
+        there is nothing to check."""
+        if is_empty(annotation):
+            return None
+        plan = self._compile_probe(annotation)
+        if plan is _valid_plan:
+            return None
+
+        name = _function_name(f)
+
+        def check_return(value: Any):
+            start = _perf_counter() if self.profile else None
+            valid = True
+            try:
+                valid = plan(value).valid
+                if not valid:
                     msg = (
-                        f"Argument error for `{p}` for function `{f.__name__}` "
-                        f"({frameinfo.filename}:{frameinfo.lineno})"
+                        f"{description} error for function `{f.__name__}` ({location})"
+                    )
+                    self._report(value, annotation, msg)
+            finally:
+                if start is not None:
+                    self._record(
+                        "functions",
+                        name,
+                        _perf_counter() - start,
+                        calls=0,
+                        failures=0 if valid else 1,
                     )
-                    if p.name in bound_args.arguments:
-                        pvalue = bound_args.arguments[p.name]
-                        checker(pvalue, p.annotation, extra_err_msg=msg)
-            return f(*args, **kwargs)
+
+        return check_return
+
+    def _validate_coroutine(
+        self,
+        f: Callable,
+        signature: Signature,
+        location: str,
+        check_args: Callable[[tuple, dict], None],
+        returns: bool,
+    ) -> Callable:
+        check_return = None
+        if returns:
+            check_return = self._return_checker(
+                f, signature.return_annotation, location, "Return value"
+            )
+
+        # arguments are checked when the function is called, before the
+        # coroutine is created or scheduled. Awaiting the returned coroutine
+        # adds no extra task or event loop iteration.
+        if check_return is None:
+
+            @functools.wraps(f)
+            def wrapped(*args, **kwargs):
+                rate = config.rate
+                if rate < 1.0 and (not rate or _random() >= rate):
+                    return f(*args, **kwargs)
+                check_args(args, kwargs)
+                return f(*args, **kwargs)
+
+        else:
+
+            async def checked(coroutine: typing.Awaitable) -> Any:
+                result = await coroutine
+                check_return(result)
+                return result
+
+            @functools.wraps(f)
+            def wrapped(*args, **kwargs):
+                rate = config.rate
+                if rate < 1.0 and (not rate or _random() >= rate):
+                    return f(*args, **kwargs)
+                check_args(args, kwargs)
+                return checked(f(*args, **kwargs))
+
+        return _mark_coroutine_function(wrapped)
+
+    def _validate_async_generator(
+        self,
+        f: Callable,
+        signature: Signature,
+        location: str,
+        check_args: Callable[[tuple, dict], None],
+        returns: bool,
+    ) -> Callable:
+        # AsyncGenerator[Y, S], AsyncIterator[Y] and AsyncIterable[Y]
+        annotation = signature.return_annotation
+        args = ()
+        if returns and not is_empty(annotation):
+            args = getattr(annotation, "__args__", None) or ()
+        check_yield = check_send = None
+        if args:
+            check_yield = self._return_checker(f, args[0], location, "Yield value")
+        if len(args) > 1:
+            check_send = self._return_checker(f, args[1], location, "Sent value")
+
+        async def checked(agen: typing.AsyncGenerator) -> typing.AsyncGenerator:
+            try:
+                item = await agen.__anext__()
+                while True:
+                    if check_yield is not None:
+                        check_yield(item)
+                    try:
+                        sent = yield item
+                    except GeneratorExit:
+                        raise
+                    except BaseException as e:
+                        item = await agen.athrow(e)
+                    else:
+                        if check_send is not None and sent is not None:
+                            check_send(sent)
+                        item = await agen.asend(sent)
+            except StopAsyncIteration:
+                return
+            finally:
+                # also closes the wrapped generator if a check fails
+                await agen.aclose()
+
+        # arguments are checked when the function is called, before the
+        # async generator is created
+        @functools.wraps(f)
+        def wrapped(*args, **kwargs):
+            rate = config.rate
+            if rate < 1.0 and (not rate or _random() >= rate):
+                return f(*args, **kwargs)
+            check_args(args, kwargs)
+            if check_yield is None and check_send is None:
+                return f(*args, **kwargs)
+            return checked(f(*args, **kwargs))
 
         return wrapped
 
 
+def _mark_coroutine_function(f: Callable) -> Callable:
+    """Mark a function returning a coroutine as a coroutine function for
+    ``inspect`` and ``asyncio``."""
+    mark = getattr(inspect, "markcoroutinefunction", None)
+    if mark is not None:
+        # Python 3.12+
+        return mark(f)
+    import asyncio.coroutines
+
+    f._is_coroutine = asyncio.coroutines._is_coroutine
+    return f
+
+
+# __origin__ of a parameterized annotation -> the compiler of its plan
+_ORIGIN_COMPILERS: typing.Dict[
+    Any, Callable[[ValueChecker, TypingType, _PlanOptions], Plan]
+] = {
+    typing.Union: ValueChecker._compile_union,
+    tuple: ValueChecker._compile_tuple,
+    collections.abc.Generator: lambda self, typ, options: self._compile_generator(typ),
+    collections.abc.Callable: lambda self, typ, options: self._compile_callable(typ),
+}
+_ORIGIN_COMPILERS.update(
+    dict.fromkeys(
+        [
+            list,
+            collections.deque,
+            collections.abc.Sequence,
+            collections.abc.MutableSequence,
+        ],
+        ValueChecker._compile_homogeneous_sequence,
+    )
+)
+_ORIGIN_COMPILERS.update(
+    dict.fromkeys(
+        [
+            set,
+            frozenset,
+            collections.abc.Set,
+            collections.abc.MutableSet,
+            collections.abc.KeysView,
+            collections.abc.ValuesView,
+            collections.abc.Collection,
+            collections.abc.Iterable,
+        ],
+        ValueChecker._compile_collection,
+    )
+)
+_ORIGIN_COMPILERS.update(
+    dict.fromkeys(
+        [
+            dict,
+            collections.defaultdict,
+            collections.OrderedDict,
+            collections.Counter,
+            collections.ChainMap,
+            collections.abc.Mapping,
+            collections.abc.MutableMapping,
+        ],
+        ValueChecker._compile_dict,
+    )
+)
+
+
+def _function_name(f: Callable) -> str:
+    """Return the name of a decorated function in profile statistics."""
+    return f"{getattr(f, '__module__', None)}.{getattr(f, '__qualname__', f)}"
+
+
+def _count_values(obj: Any) -> int:
+    """Return the number of values checked for ``obj`` in profile statistics:
+    the number of elements of containers, or 1."""
+    if isinstance(obj, (str, bytes, bytearray)):
+        return 1
+    try:
+        return len(obj)
+    except TypeError:
+        return 1
+
+
+def _gil_enabled() -> bool:
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is None or is_gil_enabled()
+
+
+def _is_picklable(obj: Any) -> bool:
+    import pickle
+
+    try:
+        pickle.dumps(obj)
+    except Exception:
+        return False
+    return True
+
+
+def _check_chunk(
+    origin: type,
+    args: Tuple[Any, ...],
+    options: _PlanOptions,
+    items: Any,
+    start: int,
+    extra_err_msg: Optional[str],
+) -> ValidationResult:
+    """Check a chunk of the elements of a container in another process, with
+    the plans of the module-level checker (see
+    :meth:`ValueChecker._check_chunk`)."""
+    return checker._check_chunk(origin, args, options, items, start, extra_err_msg)
+
+
 checker = ValueChecker(do_raise=False)
 check_value = checker
 
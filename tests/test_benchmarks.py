@@ -0,0 +1,27 @@
+#  Copyright (c) 2022. Justin Vrana - All Rights Reserved
+#   You may use, distribute and modify this code under the terms of the MIT license.
+import json
+
+import pytest
+
+from benchmarks.run import load_benchmarks
+from benchmarks.run import main
+
+BENCHMARKS = load_benchmarks()
+
+
+@pytest.mark.parametrize("name", [n for n in BENCHMARKS if "/100000" not in n])
+def test_benchmark_runs(name):
+    """Smoke test that every benchmark can be set up and called."""
+    BENCHMARKS[name].setup()()
+
+
+def test_run_json(tmp_path, capsys):
+    path = tmp_path / "results.json"
+    main(["-k", "validate_value/scalar/int", "--repeat", "1", "--json", str(path)])
+    results = json.loads(path.read_text())
+    assert set(results) == {"meta", "results"}
+    assert list(results["results"]) == ["validate_value/scalar/int"]
+
+    main(["-k", "validate_value/scalar/int", "--repeat", "1", "--compare", str(path)])
+    assert "x baseline" in capsys.readouterr().out
@@ -0,0 +1,108 @@
+#  Copyright (c) 2022. Justin Vrana - All Rights Reserved
+#   You may use, distribute and modify this code under the terms of the MIT license.
+"""Import cost of the package, measured with ``python -X importtime`` in a fresh
+interpreter."""
+import os
+import subprocess
+import sys
+from os.path import abspath
+from os.path import dirname
+from typing import Optional
+
+import pytest
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+# the modules whose import time is the reference for the budget
+REFERENCE_MODULES = ["typing", "inspect"]
+
+# import times of jdv_typecheck.check, as fractions of the time to import the
+# reference modules in the same interpreter, with bytecode cached. The whole
+# import takes about 0.3-0.35 depending on the Python version, of which the
+# modules it imports take about 0.15-0.2; importing concurrent.futures
+# eagerly would add about 0.2-0.3.
+IMPORT_BUDGET = 0.75
+DEPENDENCIES_BUDGET = 0.3
+
+# only needed for parallel checks, profile dumps, older interpreters, etc.
+DEFERRED_MODULES = [
+    "concurrent.futures",
+    "multiprocessing",
+    "pickle",
+    "json",
+    "textwrap",
+    "dataclasses",
+    "typing_extensions",
+]
+
+DECORATE = """
+import jdv_typecheck
+
+@jdv_typecheck.validate_args
+def f(x: int) -> int:
+    return x
+
+f(1)
+"""
+
+
+def importtime(code: str, pycache: Optional[str] = None) -> dict:
+    """Run ``code`` in a fresh interpreter and return the ``(self,
+    cumulative)`` import times in microseconds of each module it imported.
+
+    :param pycache: a directory to cache bytecode in, or None to use the
+        environment's settings
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    if pycache is not None:
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        env["PYTHONPYCACHEPREFIX"] = pycache
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_time, cumulative, name = line.split("|")
+        times[name.strip()] = (int(self_time.split(":")[1]), int(cumulative))
+    return times
+
+
+def test_import_is_lazy():
+    times = importtime("import jdv_typecheck")
+    assert "jdv_typecheck" in times
+    assert "jdv_typecheck.check" not in times
+
+
+def test_submodule_attribute():
+    importtime("import jdv_typecheck; assert jdv_typecheck.check.ValueChecker")
+
+
+@pytest.mark.parametrize("module", DEFERRED_MODULES)
+def test_import_and_decorate_defers(module):
+    assert module not in importtime(DECORATE)
+
+
+def test_import_budget(tmp_path):
+    code = f"import {', '.join(REFERENCE_MODULES)}\n{DECORATE}"
+    pycache = str(tmp_path)
+    # compile the bytecode first, so that only imports are timed
+    importtime(code, pycache)
+    ratios = []
+    dependency_ratios = []
+    for _ in range(5):
+        times = importtime(code, pycache)
+        reference = sum(times[module][1] for module in REFERENCE_MODULES)
+        self_time, cumulative = times["jdv_typecheck.check"]
+        ratios.append(cumulative / reference)
+        dependency_ratios.append((cumulative - self_time) / reference)
+    # the best of a few runs, to leave out noise
+    assert min(ratios) < IMPORT_BUDGET
+    assert min(dependency_ratios) < DEPENDENCIES_BUDGET
@@ -1,8 +1,15 @@
 #  Copyright (c) 2022. Justin Vrana - All Rights Reserved
 #   You may use, distribute and modify this code under the terms of the MIT license.
+import array
+import asyncio
+import collections
 import collections.abc
+import dataclasses
 import inspect
+import sys
+import threading
 import typing
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from typing import NamedTuple
 from typing import Optional
@@ -11,11 +18,15 @@ import pytest
 
 import jdv_typecheck
 from jdv_typecheck._tests import fail_type_check
+from jdv_typecheck._tests import fail_validate_args
 from jdv_typecheck._tests import for_readable_error_on_function
+from jdv_typecheck.check import get_signature
 from jdv_typecheck.check import is_builtin_inst
 from jdv_typecheck.check import is_builtin_type
 from jdv_typecheck.check import is_subclass
 from jdv_typecheck.check import is_typing_type
+from jdv_typecheck.check import NDArray
+from jdv_typecheck.check import Sampling
 from jdv_typecheck.check import TypeCheckError
 from jdv_typecheck.check import ValidationResult
 from jdv_typecheck.check import ValueChecker
@@ -25,6 +36,12 @@ class Foo:
     ...
 
 
+@dataclasses.dataclass
+class TreeNode:
+    value: int
+    children: typing.List["TreeNode"] = dataclasses.field(default_factory=list)
+
+
 @pytest.mark.parametrize(
     "typ", [dict, tuple, list, int, complex, float, str, bytes, bytearray]
 )
@@ -467,6 +484,13 @@ def test_stack_trace():
     assert "validate_value(5.0, int)" in expected_error
 
 
+def test_stack_trace_validate_args():
+    with pytest.raises(TypeCheckError) as e:
+        fail_validate_args()
+    expected_error = str(e.traceback[-1])
+    assert 'for_readable_error_on_function("str")' in expected_error
+
+
 class TestTypeCheckWrapper:
     def test_type_check_simple(self):
         check = ValueChecker(do_raise=True)
@@ -543,6 +567,86 @@ class TestTypeCheckWrapper:
         with pytest.raises(ValueChecker.default_exception_type):
             foo(1.0, "str", 1)
 
+    def test_type_check_keywords(self):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        def foo(a: int, b: str = "", *, c: dict = None):
+            ...
+
+        foo(5, b="str", c={})
+        foo(a=5)
+        with pytest.raises(ValueChecker.default_exception_type):
+            foo(a="str")
+        with pytest.raises(ValueChecker.default_exception_type):
+            foo(5, b=5)
+        with pytest.raises(ValueChecker.default_exception_type):
+            foo(5, c=5)
+
+    def test_type_check_var_args(self):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        def foo(a: int, /, *args: str, **kwargs: float):
+            ...
+
+        foo(5, "a", "b", x=1.0, y=2.0)
+        with pytest.raises(ValueChecker.default_exception_type):
+            foo("str")
+        with pytest.raises(ValueChecker.default_exception_type):
+            foo(5, "a", 1)
+        with pytest.raises(ValueChecker.default_exception_type):
+            foo(5, x="str")
+
+    def test_type_check_plain_classes(self):
+        check = ValueChecker(do_raise=True)
+
+        class Base:
+            ...
+
+        class Derived(Base):
+            ...
+
+        @check.validate_args
+        def foo(a: int, b: Base, c: typing.Union[int, str], d: typing.List[int]):
+            ...
+
+        foo(True, Derived(), "s", [1])
+        foo(a=1, b=Base(), c=1, d=[])
+        with pytest.raises(TypeCheckError) as e:
+            foo(1, object(), 1, [])
+        assert "Argument error for `b: " in str(e.value)
+        with pytest.raises(TypeCheckError):
+            foo(1, Base(), 1.0, [])
+        with pytest.raises(TypeCheckError):
+            foo(1, Base(), 1, ["s"])
+        with pytest.raises(TypeCheckError):
+            foo(1, b=Base(), c=1.0, d=[])
+
+    def test_type_check_error_message(self):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        def foo(a: int, b: str):
+            ...
+
+        with pytest.raises(TypeCheckError) as e:
+            foo(5, 5)
+        assert "Argument error for `b: str` for function `foo`" in str(e.value)
+        assert __file__ in str(e.value)
+
+    def test_type_check_invalid_call(self):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        def foo(a: int):
+            ...
+
+        with pytest.raises(TypeError):
+            foo(5, 6)
+        with pytest.raises(TypeError):
+            foo(5, b=6)
+
     def test_nested(self):
         check = ValueChecker()
         result = check(
@@ -600,3 +704,2006 @@ class TestExamples:
             for_readable_error_on_function("str")
         for tb in e.traceback:
             print(tb)
+
+
+class TestCompile:
+    def test_compile_is_cached(self):
+        check = ValueChecker()
+        typ = typing.List[typing.Dict[int, typing.Union[None, str]]]
+        plan = check.compile(typ)
+        assert check.compile(typ) is plan
+
+    @pytest.mark.parametrize(
+        "inst,valid",
+        [
+            ([], True),
+            ([{}], True),
+            ([{1: None, 2: "str"}], True),
+            ([{1: 1.0}], False),
+            ([{"1": None}], False),
+            ({}, False),
+        ],
+    )
+    def test_compiled_plan(self, inst, valid):
+        check = ValueChecker()
+        plan = check.compile(typing.List[typing.Dict[int, typing.Union[None, str]]])
+        result = plan(inst)
+        assert isinstance(result, ValidationResult)
+        assert bool(result) is valid
+
+    def test_compiled_plan_does_not_raise(self):
+        check = ValueChecker(do_raise=True)
+        plan = check.compile(typing.List[int])
+        assert not plan(["str"])
+        with pytest.raises(TypeCheckError):
+            check(["str"], typing.List[int])
+
+    def test_check_uses_compiled_plan(self):
+        check = ValueChecker()
+        typ = typing.List[typing.Tuple[typing.List[float], str]]
+        assert check([([1.0], "str")], typ)
+        plan = check.compile(typ)
+        assert not check([([1], "str")], typ)
+        assert check.compile(typ) is plan
+
+    @pytest.mark.skipif(sys.version_info < (3, 9), reason="requires Annotated")
+    def test_compile_unhashable_annotation(self):
+        check = ValueChecker()
+        typ = typing.Annotated[int, []]
+        assert check(1, typ)
+        assert not check("str", typ)
+
+    @pytest.mark.parametrize(
+        "inst,typ,valid",
+        [
+            ({1}, typing.Set[int], True),
+            ([1], typing.Set[int], False),
+            ((1, "str"), typing.Tuple[int, str], True),
+            ((1,), typing.Tuple[int, str], False),
+            ((1, "str", 2), typing.Tuple[int, str], False),
+        ],
+    )
+    def test_compile_outer_types(self, inst, typ, valid):
+        check = ValueChecker()
+        assert bool(check(inst, typ)) is valid
+
+
+class TestCheckHandler:
+    def test_valid_result_skips_handle(self, monkeypatch):
+        calls = []
+        check = ValueChecker(do_raise=True)
+        monkeypatch.setattr(check, "_handle", lambda *a, **k: calls.append(a))
+        assert check(list(range(1000)), typing.List[int])
+        assert check.is_instance_of(5, int)
+        assert calls == []
+
+    def test_policy_resolved_once_for_nested_failures(self, monkeypatch):
+        check = ValueChecker(do_raise=True)
+        handle = check._handle
+        calls = []
+
+        def counting_handle(x, **kwargs):
+            calls.append(kwargs)
+            return handle(x, **kwargs)
+
+        monkeypatch.setattr(check, "_handle", counting_handle)
+        with pytest.raises(TypeCheckError):
+            check([1, "2", 3, "4"], typing.List[int])
+        assert len(calls) == 1
+
+
+class TestValidationResult:
+    def test_message_is_rendered_lazily(self):
+        rendered = []
+
+        class Expensive:
+            def __str__(self):
+                rendered.append(self)
+                return "expensive"
+
+        check = ValueChecker()
+        result = check([1, Expensive()], typing.List[int])
+        assert not result
+        assert rendered == []
+        assert "Expected <class 'test_typecheck.TestValidationResult" in result.msg
+        assert "'expensive' to be a <class 'int'>." in result.msg
+        assert len(rendered) == 1
+        result.msg
+        assert len(rendered) == 1
+
+    def test_named_tuple_compatibility(self):
+        result = ValueChecker()("a", int)
+        valid, msg = result
+        assert len(result) == 2
+        assert result[0] is False and result[1] == msg
+        assert result[-1] == msg and result[:1] == (False,)
+        assert result == (False, msg)
+        assert result._fields == ("valid", "msg")
+        assert result._asdict() == {"valid": False, "msg": msg}
+        replaced = result._replace(msg="other")
+        assert tuple(replaced) == (False, "other")
+        assert result._replace(valid=True) == (True, msg)
+        with pytest.raises(ValueError):
+            result._replace(foo=1)
+        assert ValidationResult(True, "") == (True, "")
+
+    def test_union_message_is_rendered_lazily(self):
+        class Unprintable:
+            def __str__(self):
+                raise AssertionError("message should not be rendered")
+
+        check = ValueChecker()
+        assert not check(Unprintable(), typing.Union[int, str, typing.List[int]])
+        assert not check(Unprintable(), typing.Union[int, str]).valid
+
+    def test_failure_paths(self):
+        check = ValueChecker()
+        result = check(
+            {"a": [1, 2], "b": [3, "4"], "c": ["5"]}, typing.Dict[str, typing.List[int]]
+        )
+        assert not result
+        assert [f.path for f in result.failures] == [("b", 1), ("c", 0)]
+        assert [f.value for f in result.failures] == ["4", "5"]
+        assert all(f.expected is int for f in result.failures)
+
+    def test_typed_dict_failure_paths(self):
+        class Point(typing.TypedDict):
+            x: int
+            y: typing.List[int]
+
+        check = ValueChecker()
+        result = check({"y": [1, "2"]}, Point)
+        assert [f.path for f in result.failures] == [("x",), ("y", 1)]
+
+    def test_result_compat(self):
+        result = ValidationResult(False, "some message")
+        valid, msg = result
+        assert valid is False
+        assert msg == "some message"
+        assert result == ValidationResult(False, "some message")
+        assert result != ValidationResult(True, "")
+        assert "some message" in repr(result)
+
+    def test_combine(self):
+        check = ValueChecker()
+        result = check(1.0, int).combine(check("str", int))
+        assert not result
+        assert len(result.failures) == 2
+        assert result.msg == (
+            "Expected <class 'float'> '1.0' to be a <class 'int'>.\n\n"
+            "Expected <class 'str'> 'str' to be a <class 'int'>."
+        )
+        assert check(1, int).combine(check(2, int))
+
+
+class TestFailFast:
+    def test_collects_all_errors_by_default(self):
+        check = ValueChecker()
+        result = check(["a", 1, "b", "c"], typing.List[int])
+        assert len(result.failures) == 3
+
+    def test_fail_fast(self):
+        check = ValueChecker(fail_fast=True)
+        result = check(["a", 1, "b", "c"], typing.List[int])
+        assert not result
+        assert len(result.failures) == 1
+        assert result.failures[0].path == (0,)
+
+    def test_fail_fast_stops_iterating(self):
+        seen = []
+
+        def values():
+            for v in ["a", "b", "c"]:
+                seen.append(v)
+                yield v
+
+        class Seq(list):
+            def __iter__(self):
+                return values()
+
+        check = ValueChecker(fail_fast=True)
+        assert not check(Seq(["a", "b", "c"]), typing.List[int])
+        assert seen == ["a"]
+
+    def test_fail_fast_per_call(self):
+        check = ValueChecker()
+        result = check(["a", "b"], typing.List[int], fail_fast=True)
+        assert len(result.failures) == 1
+        result = check(["a", "b"], typing.List[int])
+        assert len(result.failures) == 2
+
+        check = ValueChecker(fail_fast=True)
+        result = check(["a", "b"], typing.List[int], fail_fast=False)
+        assert len(result.failures) == 2
+
+    @pytest.mark.parametrize("max_errors", [1, 2, 3])
+    def test_max_errors(self, max_errors):
+        check = ValueChecker(max_errors=max_errors)
+        typ = typing.List[typing.Dict[str, typing.List[int]]]
+        result = check([{"a": ["1", "2"], "b": ["3"]}, {"c": ["4", "5"]}], typ)
+        assert len(result.failures) == max_errors
+        result = check([{"a": ["1", "2"]}], typ, max_errors=None)
+        assert len(result.failures) == 2
+
+    @pytest.mark.parametrize("max_errors", [0, -1, 1.0])
+    def test_invalid_max_errors(self, max_errors):
+        with pytest.raises(ValueError):
+            ValueChecker(max_errors=max_errors)
+        with pytest.raises(ValueError):
+            ValueChecker()(1, int, max_errors=max_errors)
+
+    def test_fail_fast_typed_dict(self):
+        class Point(typing.TypedDict):
+            x: int
+            y: int
+
+        check = ValueChecker(fail_fast=True)
+        result = check({}, Point)
+        assert [f.path for f in result.failures] == [("x",)]
+
+    def test_fail_fast_raises(self):
+        check = ValueChecker(do_raise=True, fail_fast=True)
+        with pytest.raises(TypeCheckError) as e:
+            check([1, "2", "3"], typing.List[int])
+        assert "'2'" in str(e.value)
+        assert "'3'" not in str(e.value)
+
+
+class TestSampling:
+    def test_small_containers_are_fully_checked(self):
+        check = ValueChecker(sample=True)
+        result = check(list(range(10)), typing.List[int])
+        assert result
+        assert not result.sampled
+        result = check([*range(10), "a"], typing.List[int])
+        assert not result
+
+    @pytest.mark.parametrize(
+        "inst,typ",
+        [
+            (list(range(10000)), typing.List[int]),
+            (tuple(range(10000)), typing.Tuple[int, ...]),
+            ({i: str(i) for i in range(10000)}, typing.Dict[int, str]),
+            ([list(range(100))], typing.List[typing.List[int]]),
+            ({"a": list(range(100))}, typing.Dict[str, typing.List[int]]),
+            (
+                [(1, list(range(100)))],
+                typing.List[typing.Tuple[int, typing.List[int]]],
+            ),
+            (list(range(100)), typing.Optional[typing.List[int]]),
+        ],
+    )
+    def test_sampled_pass(self, inst, typ):
+        check = ValueChecker(sample=True)
+        result = check(inst, typ)
+        assert result
+        assert result.sampled
+        assert not check(inst, typ, sample=False).sampled
+
+    def test_sample_checks_head_and_tail(self):
+        check = ValueChecker(sample=Sampling(head=5, tail=5, middle=0))
+        values = list(range(100))
+        assert check(values[:50] + ["a"] + values[50:], typing.List[int])
+        assert not check(["a"] + values, typing.List[int])
+        assert not check(values + ["a"], typing.List[int])
+
+    def test_sample_is_seeded(self):
+        values = list(range(1000))
+        values[500] = "a"
+        results = [
+            bool(ValueChecker(sample=Sampling(seed=1))(values, typing.List[int]))
+            for _ in range(3)
+        ]
+        assert len(set(results)) == 1
+
+    def test_sample_per_call(self):
+        check = ValueChecker()
+        result = check(list(range(100)), typing.List[int], sample=True)
+        assert result.sampled
+        result = check(list(range(100)), typing.List[int])
+        assert not result.sampled
+
+    def test_sampled_failure(self):
+        check = ValueChecker(sample=Sampling(head=1, tail=1, middle=1))
+        result = check(["a"] * 100, typing.List[int])
+        assert not result
+        assert result.sampled
+        assert len(result.failures) == 3
+
+    def test_invalid_sample(self):
+        with pytest.raises(ValueError):
+            ValueChecker(sample=5)
+
+
+class TestSignatureCache:
+    @pytest.fixture
+    def signature_calls(self, monkeypatch):
+        calls = []
+        signature = inspect.signature
+
+        def counting_signature(obj, *args, **kwargs):
+            calls.append(obj)
+            return signature(obj, *args, **kwargs)
+
+        monkeypatch.setattr(inspect, "signature", counting_signature)
+        return calls
+
+    def test_get_signature_is_cached(self, signature_calls):
+        def foo(a: int, b: str) -> float:
+            ...
+
+        assert get_signature(foo) is get_signature(foo)
+        assert signature_calls == [foo]
+
+    def test_get_signature_invalidated(self, signature_calls):
+        def foo(a: int, b: str) -> float:
+            ...
+
+        s1 = get_signature(foo)
+        foo.__signature__ = inspect.Signature()
+        s2 = get_signature(foo)
+        assert s1 is not s2
+        assert s2 == inspect.Signature()
+
+        def bar(a: int):
+            ...
+
+        foo.__wrapped__ = bar
+        get_signature(foo)
+        assert len(signature_calls) == 3
+
+    def test_get_signature_bound_method(self, signature_calls):
+        class Foo:
+            def foo(self, a: int) -> float:
+                ...
+
+        assert get_signature(Foo().foo) == inspect.signature(Foo().foo)
+        get_signature(Foo().foo)
+        assert signature_calls.count(Foo.foo) == 1
+
+    def test_callable_check_is_cached(self, signature_calls):
+        check = ValueChecker()
+
+        def foo(a: int, b: float) -> str:
+            ...
+
+        typ = typing.Callable[[int, float], str]
+        for _ in range(5):
+            assert check(foo, typ)
+            assert not check(foo, typing.Callable[[int, float], int])
+        assert signature_calls == [foo]
+
+    def test_callable_check_invalidated(self):
+        check = ValueChecker()
+
+        def foo(a: int, b: float) -> str:
+            ...
+
+        typ = typing.Callable[[int, float], str]
+        assert check(foo, typ)
+        foo.__signature__ = inspect.Signature()
+        assert not check(foo, typ)
+
+    def test_same_signature_is_cached(self, signature_calls):
+        check = ValueChecker()
+
+        def foo(a: int):
+            ...
+
+        def bar(a: int):
+            ...
+
+        for _ in range(5):
+            assert check.same_signature(foo, bar)
+        assert signature_calls == [foo, bar]
+
+
+class TestNDArray:
+    @pytest.fixture
+    def np(self):
+        return pytest.importorskip("numpy")
+
+    def test_ndarray(self, np):
+        check = ValueChecker()
+        assert check(np.zeros(3), NDArray)
+        assert check(np.zeros(3), NDArray[typing.Any])
+        assert not check([0.0], NDArray)
+
+    @pytest.mark.parametrize(
+        "dtype,valid",
+        [
+            ("float64", True),
+            (float, True),
+            ("float32", False),
+            ("int64", False),
+        ],
+    )
+    def test_ndarray_dtype(self, np, dtype, valid):
+        check = ValueChecker()
+        assert bool(check(np.zeros(3), NDArray[dtype])) is valid
+        assert bool(check(np.zeros(3), NDArray[np.dtype(dtype)])) is valid
+
+    def test_ndarray_abstract_dtype(self, np):
+        check = ValueChecker()
+        assert check(np.zeros(3, dtype="float32"), NDArray[np.floating])
+        assert check(np.zeros(3, dtype="float64"), NDArray[np.floating])
+        assert not check(np.zeros(3, dtype="int64"), NDArray[np.floating])
+        assert check(np.zeros(3, dtype="int8"), NDArray[np.integer])
+
+    @pytest.mark.parametrize(
+        "shape,valid",
+        [
+            ((10, 3), True),
+            ((1, 3), True),
+            ((10, 4), False),
+            ((10,), False),
+            ((10, 3, 1), False),
+        ],
+    )
+    def test_ndarray_shape(self, np, shape, valid):
+        check = ValueChecker()
+        N = typing.TypeVar("N")
+        arr = np.zeros(shape)
+        assert bool(check(arr, NDArray[np.float64, (N, 3)])) is valid
+        assert bool(check(arr, NDArray[np.float64, ("N", 3)])) is valid
+        assert bool(check(arr, NDArray[np.float64, (None, 3)])) is valid
+
+    def test_ndarray_named_dims(self, np):
+        check = ValueChecker()
+        typ = NDArray[np.float64, ("N", "N")]
+        assert check(np.zeros((3, 3)), typ)
+        assert not check(np.zeros((3, 4)), typ)
+
+    def test_ndarray_in_containers(self, np):
+        check = ValueChecker()
+        typ = typing.Dict[str, NDArray[np.float64, ("N", 3)]]
+        assert check({"a": np.zeros((5, 3))}, typ)
+        result = check({"a": np.zeros((5, 3)), "b": np.zeros(5)}, typ)
+        assert not result
+        assert result.failures[0].path == ("b",)
+        assert "NDArray[float64, (N, 3)]" in result.msg
+        assert "shape (5,)" in result.msg
+        assert check([np.zeros(2)], typing.List[NDArray])
+        assert not check([[0.0]], typing.List[NDArray])
+        with pytest.raises(TypeError):
+            NDArray[float]()
+
+    def test_ndarray_validate_args(self, np):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        def foo(points: NDArray[np.float64, ("N", 3)]):
+            ...
+
+        foo(np.zeros((2, 3)))
+        with pytest.raises(TypeCheckError):
+            foo(np.zeros((2, 2)))
+
+    def test_buffer_ndarray(self, np):
+        check = ValueChecker(buffers=True)
+        assert check(np.zeros(1000), typing.List[float])
+        assert check(np.zeros(1000, dtype="int32"), typing.List[int])
+        assert not check(np.zeros(1000, dtype="int32"), typing.List[float])
+        assert not check(np.zeros((10, 10)), typing.List[float])
+
+
+class TestBuffers:
+    @pytest.mark.parametrize(
+        "inst,typ,valid",
+        [
+            (array.array("q", range(100)), typing.List[int], True),
+            (array.array("d", [1.0]), typing.List[float], True),
+            (array.array("d", [1.0]), typing.List[int], False),
+            (array.array("q", [1]), typing.List[float], False),
+            (array.array("q", [1]), typing.Tuple[int, ...], True),
+            (memoryview(array.array("q", [1])), typing.List[int], True),
+            (b"bytes", typing.List[int], True),
+            ("str", typing.List[int], False),
+            ([1, 2], typing.List[int], True),
+            ([1, "2"], typing.List[int], False),
+        ],
+    )
+    def test_buffers(self, inst, typ, valid):
+        check = ValueChecker(buffers=True)
+        assert bool(check(inst, typ)) is valid
+
+    def test_buffers_are_opt_in(self):
+        check = ValueChecker()
+        values = array.array("q", [1])
+        assert not check(values, typing.List[int])
+        assert check(values, typing.List[int], buffers=True)
+
+
+class TestResultCache:
+    def test_cache_is_opt_in(self):
+        check = ValueChecker()
+        check(1, int)
+        assert check.cache_info() == (0, 0, 0, 0)
+
+    def test_cache_hits(self):
+        check = ValueChecker(cache_size=10)
+        typ = typing.Tuple[typing.Tuple[int, str], ...]
+        value = ((1, "a"), (2, "b"))
+        assert check(value, typ)
+        assert check(value, typ)
+        assert check(((1, "a"), (2, "b")), typ)
+        assert check.cache_info() == (2, 1, 10, 1)
+
+    def test_cache_does_not_skip_policy(self):
+        check = ValueChecker(cache_size=10, do_raise=True)
+        for _ in range(2):
+            with pytest.raises(TypeCheckError):
+                check(("a",), typing.Tuple[int, ...])
+        assert check.cache_info().hits == 1
+
+    @pytest.mark.parametrize(
+        "a,b,typ",
+        [
+            (1, True, bool),
+            (1, 1.0, int),
+            ((1, 2), (True, 2), typing.Tuple[bool, int]),
+            (frozenset([1]), frozenset([True]), typing.FrozenSet[int]),
+        ],
+    )
+    def test_equal_values_of_different_types(self, a, b, typ):
+        check = ValueChecker(cache_size=10)
+        assert a == b
+        for value in (a, b, a, b):
+            assert bool(check(value, typ)) is bool(ValueChecker()(value, typ))
+        assert check.cache_info().misses == 2
+        assert check.cache_info().hits == 2
+
+    def test_mutable_values_are_not_cached(self):
+        check = ValueChecker(cache_size=10)
+        check([1], typing.List[int])
+        check((1, [1]), typing.Tuple[int, typing.List[int]])
+        assert check.cache_info() == (0, 0, 10, 0)
+
+    def test_enum_values_are_cached(self):
+        class Color(Enum):
+            red = "red"
+
+        check = ValueChecker(cache_size=10)
+        check(Color.red, Color)
+        check(Color.red, Color)
+        assert check.cache_info().hits == 1
+
+    def test_cache_eviction(self):
+        check = ValueChecker(cache_size=2)
+        check(1, int)
+        check(2, int)
+        check(1, int)
+        check(3, int)
+        assert check.cache_info().currsize == 2
+        check(1, int)
+        assert check.cache_info().hits == 2
+        check(2, int)
+        assert check.cache_info().misses == 4
+
+    def test_cache_keyed_on_message_and_options(self):
+        check = ValueChecker(cache_size=10)
+        r1 = check(("a", "b"), typing.Tuple[int, ...])
+        r2 = check(("a", "b"), typing.Tuple[int, ...], fail_fast=True)
+        r3 = check(("a", "b"), typing.Tuple[int, ...], extra_err_msg="extra")
+        assert len(r1.failures) == 2
+        assert len(r2.failures) == 1
+        assert "extra" in r3.msg
+        assert check.cache_info().misses == 3
+
+    def test_cache_clear(self):
+        check = ValueChecker(cache_size=10)
+        check(1, int)
+        check(1, int)
+        check.cache_clear()
+        assert check.cache_info() == (0, 0, 10, 0)
+
+
+class TestStream:
+    @staticmethod
+    def echo():
+        received = yield 1
+        while received is not None:
+            received = yield received
+        return "done"
+
+    def test_stream_is_lazy(self):
+        consumed = []
+
+        def gen():
+            for i in range(3):
+                consumed.append(i)
+                yield i
+
+        stream = ValueChecker(do_raise=True).stream(gen(), typing.Iterator[int])
+        assert isinstance(stream, collections.abc.Generator)
+        assert consumed == []
+        assert next(stream) == 0
+        assert consumed == [0]
+        assert list(stream) == [1, 2]
+        assert stream.index == 3
+        assert stream.result
+
+    @pytest.mark.parametrize(
+        "typ",
+        [typing.Iterable[int], typing.Iterator[int], typing.Generator[int, None, None]],
+    )
+    def test_stream_raises_on_yielded_item(self, typ):
+        stream = ValueChecker(do_raise=True).stream((x for x in [1, 2, "a", 3]), typ)
+        assert next(stream) == 1
+        assert next(stream) == 2
+        with pytest.raises(TypeCheckError) as e:
+            next(stream)
+        assert "item 2" in str(e.value)
+
+    def test_stream_collects_failures(self):
+        stream = ValueChecker().stream([1, "a", 2, "b"], typing.Iterable[int])
+        assert list(stream) == [1, "a", 2, "b"]
+        assert not stream.result
+        assert [f.path for f in stream.result.failures] == [(1,), (3,)]
+
+    def test_stream_max_errors(self):
+        stream = ValueChecker(fail_fast=True).stream(["a"] * 100, typing.Iterable[int])
+        assert len(list(stream)) == 100
+        assert len(stream.result.failures) == 1
+
+    def test_stream_warns(self):
+        stream = ValueChecker(do_warn=True).stream([1, "a"], typing.Iterable[int])
+        with pytest.warns(jdv_typecheck.TypeCheckWarning):
+            assert list(stream) == [1, "a"]
+
+    def test_stream_send_and_return(self):
+        validator = ValueChecker(do_raise=True)
+        stream = validator.stream(
+            self.echo(), typing.Generator[int, Optional[int], str]
+        )
+        assert next(stream) == 1
+        assert stream.send(2) == 2
+        with pytest.raises(TypeCheckError) as e:
+            stream.send("a")
+        assert "value sent" in str(e.value)
+        with pytest.raises(StopIteration) as e:
+            stream.send(None)
+        assert e.value.value == "done"
+
+        stream = validator.stream(
+            self.echo(), typing.Generator[int, Optional[int], int]
+        )
+        next(stream)
+        with pytest.raises(TypeCheckError) as e:
+            stream.send(None)
+        assert "return value" in str(e.value)
+
+    def test_stream_send_priming(self):
+        def gen():
+            received = yield 0
+            while True:
+                received = yield len(received)
+
+        validator = ValueChecker(do_raise=True)
+        stream = validator.stream(gen(), typing.Generator[int, str, None])
+        assert stream.send(None) == 0
+        assert stream.send("abc") == 3
+        with pytest.raises(TypeCheckError):
+            stream.send(None)
+
+        @validator.validate_args(returns=True)
+        def decorated() -> typing.Generator[int, str, None]:
+            return gen()
+
+        stream = decorated()
+        assert stream.send(None) == 0
+        assert stream.send("ab") == 2
+
+    def test_stream_throw_and_close(self):
+        closed = []
+
+        def gen():
+            try:
+                yield 1
+                yield 2
+            except ValueError:
+                yield "recovered"
+            finally:
+                closed.append(True)
+
+        stream = ValueChecker().stream(gen(), typing.Generator[int, None, None])
+        next(stream)
+        assert stream.throw(ValueError) == "recovered"
+        assert not stream.result
+        stream.close()
+        assert closed == [True]
+
+    def test_stream_checks_outer_type(self):
+        with pytest.raises(TypeCheckError):
+            ValueChecker(do_raise=True).stream([1], typing.Generator[int, None, None])
+        stream = ValueChecker().stream([1], typing.Generator[int, None, None])
+        assert list(stream) == [1]
+        assert not stream.result
+
+    def test_stream_bare_annotation(self):
+        stream = ValueChecker(do_raise=True).stream(iter([1, "a"]), typing.Iterator)
+        assert list(stream) == [1, "a"]
+
+    def test_stream_invalid_annotation(self):
+        with pytest.raises(TypeError):
+            ValueChecker().stream([1], typing.List[int])
+
+
+class TestAsyncValidateArgs:
+    def test_coroutine_function(self):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        async def foo(a: int) -> int:
+            await asyncio.sleep(0)
+            return a
+
+        assert asyncio.iscoroutinefunction(foo)
+        if sys.version_info >= (3, 12):
+            assert inspect.iscoroutinefunction(foo)
+        assert asyncio.run(foo(1)) == 1
+        with pytest.raises(TypeCheckError):
+            foo("a")
+
+    def test_arguments_checked_before_body(self):
+        check = ValueChecker(do_raise=True)
+        called = []
+
+        @check.validate_args
+        async def foo(a: int):
+            called.append(a)
+
+        # the call itself raises, before a coroutine is created or scheduled
+        with pytest.raises(TypeCheckError):
+            foo("a")
+        assert called == []
+
+    def test_coroutine_return_value(self):
+        check = ValueChecker(do_raise=True, check_returns=True)
+
+        @check.validate_args
+        async def foo(a) -> int:
+            return a
+
+        assert asyncio.run(foo(1)) == 1
+        with pytest.raises(TypeCheckError) as e:
+            asyncio.run(foo("a"))
+        assert "Return value error" in str(e.value)
+
+    def test_return_value_is_opt_in(self):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        async def foo(a) -> int:
+            return a
+
+        assert asyncio.run(foo("a")) == "a"
+
+    def test_async_generator(self):
+        check = ValueChecker(do_raise=True, check_returns=True)
+
+        @check.validate_args
+        async def foo(*values: int) -> typing.AsyncIterator[int]:
+            for v in values:
+                yield v
+
+        async def consume(agen):
+            return [v async for v in agen]
+
+        assert inspect.isasyncgen(foo(1))
+        assert asyncio.run(consume(foo(1, 2, 3))) == [1, 2, 3]
+        # arguments are checked by the call, before iterating
+        with pytest.raises(TypeCheckError):
+            foo(1, "a")
+
+        @check.validate_args
+        async def bar(values) -> typing.AsyncIterator[int]:
+            for v in values:
+                yield v
+
+        with pytest.raises(TypeCheckError) as e:
+            asyncio.run(consume(bar([1, "a"])))
+        assert "Yield value error" in str(e.value)
+
+    def test_async_generator_send_and_throw(self):
+        check = ValueChecker(do_raise=True, check_returns=True)
+        closed = []
+
+        @check.validate_args
+        async def echo() -> typing.AsyncGenerator[int, int]:
+            received = 0
+            try:
+                while True:
+                    try:
+                        received = yield received
+                    except ValueError:
+                        received = -1
+            finally:
+                closed.append(True)
+
+        async def run():
+            agen = echo()
+            assert await agen.asend(None) == 0
+            assert await agen.asend(2) == 2
+            assert await agen.athrow(ValueError) == -1
+            with pytest.raises(TypeCheckError):
+                await agen.asend("a")
+            assert closed == [True]
+
+        asyncio.run(run())
+        assert closed == [True]
+
+
+class TestReturnValidation:
+    def test_return_value_is_opt_in(self):
+        for_readable_error_on_function(1)
+
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        def foo(a) -> int:
+            return a
+
+        assert foo("a") == "a"
+
+    @pytest.mark.parametrize(
+        "checker,decorate",
+        [
+            (
+                ValueChecker(do_raise=True, check_returns=True),
+                lambda c: c.validate_args,
+            ),
+            (ValueChecker(do_raise=True), lambda c: c.validate_args(returns=True)),
+        ],
+    )
+    def test_return_value(self, checker, decorate):
+        @decorate(checker)
+        def foo(a) -> typing.List[int]:
+            return a
+
+        assert foo([1, 2]) == [1, 2]
+        with pytest.raises(TypeCheckError) as e:
+            foo([1, "a"])
+        assert "Return value error for function `foo`" in str(e.value)
+
+    def test_return_value_with_only(self):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args("a", returns=True)
+        def foo(a: int, b: int) -> int:
+            return b
+
+        assert foo(1, 2) == 2
+        with pytest.raises(TypeCheckError):
+            foo(1, "a")
+
+    def test_override_checker_default(self):
+        check = ValueChecker(do_raise=True, check_returns=True)
+
+        @check.validate_args(returns=False)
+        def foo(a) -> int:
+            return a
+
+        assert foo("a") == "a"
+
+    def test_unannotated_return(self):
+        check = ValueChecker(do_raise=True, check_returns=True)
+
+        @check.validate_args
+        def foo(a: int):
+            return "a"
+
+        assert foo(1) == "a"
+
+    def test_generator_function(self):
+        check = ValueChecker(do_raise=True, check_returns=True)
+
+        @check.validate_args
+        def foo(values) -> typing.Generator[int, None, str]:
+            yield from values
+            return "done"
+
+        assert list(foo([1, 2])) == [1, 2]
+        values = foo([1, "a"])
+        assert next(values) == 1
+        with pytest.raises(TypeCheckError) as e:
+            next(values)
+        assert "Return value error for function `foo`" in str(e.value)
+
+
+class TestConfig:
+    @pytest.fixture(autouse=True)
+    def restore_config(self):
+        rate, strip = jdv_typecheck.config.rate, jdv_typecheck.config.strip
+        yield
+        jdv_typecheck.configure(rate=rate, strip=strip)
+
+    @pytest.mark.parametrize(
+        "mode,rate",
+        [
+            ("off", 0.0),
+            ("always", 1.0),
+            ("sample(0.01)", 0.01),
+            ("sample:0.5", 0.5),
+            (" OFF ", 0.0),
+        ],
+    )
+    def test_modes(self, mode, rate):
+        config = jdv_typecheck.Config().configure(mode)
+        assert config.rate == rate
+
+    @pytest.mark.parametrize("mode", ["sometimes", "sample(2)", "sample(x)"])
+    def test_invalid_modes(self, mode):
+        with pytest.raises(ValueError):
+            jdv_typecheck.Config().configure(mode)
+
+    def test_sample_requires_rate(self):
+        with pytest.raises(ValueError):
+            jdv_typecheck.Config().configure("sample")
+        assert jdv_typecheck.Config().configure("sample", rate=0.1).mode == "sample"
+
+    @pytest.mark.parametrize(
+        "environ,mode,strip",
+        [
+            ({}, "always", False),
+            ({"JDV_TYPECHECK": "off"}, "off", False),
+            ({"JDV_TYPECHECK": "sample(0.01)"}, "sample", False),
+            ({"JDV_TYPECHECK": "off", "JDV_TYPECHECK_STRIP": "1"}, "off", True),
+            ({"JDV_TYPECHECK_STRIP": "0"}, "always", False),
+        ],
+    )
+    def test_from_env(self, environ, mode, strip):
+        config = jdv_typecheck.Config.from_env(environ)
+        assert config.mode == mode
+        assert config.strip is strip
+
+    def test_off(self):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args(returns=True)
+        def foo(a: int) -> int:
+            return a
+
+        jdv_typecheck.configure("off")
+        assert foo("a") == "a"
+        # raising checks are skipped, predicates still check
+        assert check("a", int).valid
+        assert not check("a", int, do_raise=False).valid
+        assert not jdv_typecheck.checker("a", int).valid
+        assert not jdv_typecheck.check_value("a", int).valid
+        with check.override(do_raise=False):
+            assert not check("a", int).valid
+        jdv_typecheck.configure("always")
+        with pytest.raises(TypeCheckError):
+            foo("a")
+        with pytest.raises(TypeCheckError):
+            check("a", int)
+
+    def test_sample(self, monkeypatch):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        def foo(a: int):
+            return a
+
+        jdv_typecheck.configure("sample(0.25)")
+        randoms = iter([0.5, 0.1])
+        monkeypatch.setattr("jdv_typecheck.check._random", lambda: next(randoms))
+        assert foo("a") == "a"
+        with pytest.raises(TypeCheckError):
+            foo("a")
+
+    def test_off_async(self):
+        check = ValueChecker(do_raise=True, check_returns=True)
+
+        @check.validate_args
+        async def foo(a: int) -> int:
+            return a
+
+        @check.validate_args
+        async def bar(a: int) -> typing.AsyncIterator[int]:
+            yield a
+
+        async def consume(agen):
+            return [v async for v in agen]
+
+        jdv_typecheck.configure("off")
+        assert asyncio.run(foo("a")) == "a"
+        assert asyncio.run(consume(bar("a"))) == ["a"]
+
+    def test_strip(self):
+        def foo(a: int):
+            return a
+
+        jdv_typecheck.configure("off", strip=True)
+        assert ValueChecker(do_raise=True).validate_args(foo) is foo
+        jdv_typecheck.configure("always")
+        assert ValueChecker(do_raise=True).validate_args(foo) is not foo
+
+    def test_validate_signature_off(self):
+        def foo(a: int):
+            ...
+
+        jdv_typecheck.configure("off")
+        validate_signature = ValueChecker(do_raise=True).validate_signature(foo)
+
+        @validate_signature
+        def bar(b: str):
+            ...
+
+
+class TestOverride:
+    def test_override(self):
+        check = ValueChecker(do_raise=True)
+        with check.override(do_raise=False) as c:
+            assert c is check
+            assert not check("a", int)
+        with pytest.raises(TypeCheckError):
+            check("a", int)
+
+    def test_explicit_arguments_take_precedence(self):
+        check = ValueChecker()
+        with check.override(do_raise=True):
+            assert not check("a", int, do_raise=False)
+            with pytest.raises(TypeCheckError):
+                check("a", int)
+
+    def test_nested_overrides(self):
+        class CustomError(Exception):
+            pass
+
+        check = ValueChecker()
+        with check.override(do_raise=True, exception_type=CustomError):
+            with check.override(do_raise=False, do_warn=True):
+                with pytest.warns(jdv_typecheck.TypeCheckWarning):
+                    check("a", int)
+            with pytest.raises(CustomError):
+                check("a", int)
+
+    def test_override_applies_to_validate_args(self):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        def foo(a: int):
+            return a
+
+        with check.override(do_raise=False):
+            assert foo("a") == "a"
+
+    def test_override_is_per_checker(self):
+        a, b = ValueChecker(do_raise=True), ValueChecker(do_raise=True)
+        with a.override(do_raise=False):
+            assert not a("x", int)
+            with pytest.raises(TypeCheckError):
+                b("x", int)
+
+    def test_override_is_per_task(self):
+        check = ValueChecker(do_raise=True)
+
+        async def task(do_raise):
+            with check.override(do_raise=do_raise):
+                await asyncio.sleep(0)
+                try:
+                    check("a", int)
+                except TypeCheckError:
+                    return True
+                return False
+
+        async def main():
+            return await asyncio.gather(*[task(i % 2 == 0) for i in range(10)])
+
+        assert asyncio.run(main()) == [i % 2 == 0 for i in range(10)]
+
+
+class TestConcurrency:
+    n_threads = 16
+
+    def run_threads(self, target, *args):
+        barrier = threading.Barrier(self.n_threads)
+        errors = []
+
+        def run(i):
+            try:
+                barrier.wait()
+                target(i, *args)
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=run, args=(i,)) for i in range(self.n_threads)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+
+    def test_per_thread_overrides(self):
+        check = ValueChecker(do_raise=True)
+
+        def target(i):
+            for _ in range(200):
+                with check.override(do_raise=i % 2 == 0):
+                    try:
+                        check("a", int)
+                        raised = False
+                    except TypeCheckError:
+                        raised = True
+                    assert raised is (i % 2 == 0)
+
+        self.run_threads(target)
+
+    def test_per_thread_exception_types(self):
+        check = ValueChecker(do_raise=True)
+        errors = [type(f"Error{i}", (Exception,), {}) for i in range(self.n_threads)]
+
+        def target(i):
+            with check.override(exception_type=errors[i]):
+                for _ in range(200):
+                    with pytest.raises(errors[i]):
+                        check("a", int)
+
+        self.run_threads(target)
+
+    def test_concurrent_compile(self):
+        check = ValueChecker()
+        typs = [
+            typing.List[typing.Dict[str, typing.Tuple[int, ...]]],
+            typing.Dict[str, typing.List[typing.Optional[int]]],
+        ]
+        plans = [[] for _ in range(self.n_threads)]
+
+        def target(i):
+            for typ in typs:
+                plans[i].append(check.compile(typ))
+
+        self.run_threads(target)
+        for thread_plans in plans:
+            assert [p is q for p, q in zip(thread_plans, plans[0])] == [True, True]
+
+    def test_concurrent_result_cache(self):
+        check = ValueChecker(cache_size=64)
+        n_calls = 500
+
+        def target(i):
+            for j in range(n_calls):
+                value = (j % 100, str(j % 100))
+                assert check(value, typing.Tuple[int, str])
+                assert not check(value, typing.Tuple[str, str])
+
+        self.run_threads(target)
+        info = check.cache_info()
+        assert info.hits + info.misses == self.n_threads * n_calls * 2
+        assert info.currsize <= 64
+
+    def test_concurrent_validate_args(self):
+        check = ValueChecker(do_raise=True, check_returns=True)
+
+        @check.validate_args
+        def foo(a: typing.List[int], b: typing.Optional[str] = None) -> int:
+            return len(a)
+
+        def target(i):
+            for j in range(200):
+                assert foo(list(range(j % 10)), b=str(i)) == j % 10
+                with pytest.raises(TypeCheckError):
+                    foo([i, "a"])
+
+        self.run_threads(target)
+
+    def test_concurrent_signature_cache(self):
+        check = ValueChecker()
+        functions = []
+        for i in range(20):
+            exec(f"def f{i}(a: int) -> str: ...", globals(), locals())
+            functions.append(locals()[f"f{i}"])
+
+        def target(i):
+            for _ in range(20):
+                for f in functions:
+                    assert check(f, typing.Callable[[int], str])
+                    assert get_signature(f) is get_signature(f)
+
+        self.run_threads(target)
+
+    def test_sampled_checks_in_threads(self):
+        check = ValueChecker(sample=True)
+        values = list(range(10000))
+
+        def target(i):
+            for _ in range(50):
+                result = check(values, typing.List[int])
+                assert result and result.sampled
+
+        self.run_threads(target)
+
+    def test_shared_checker_in_thread_pool(self):
+        check = ValueChecker(do_raise=True)
+
+        def job(i):
+            with check.override(do_raise=False):
+                return bool(check(i if i % 3 else "a", int))
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(job, range(300)))
+        assert results == [bool(i % 3) for i in range(300)]
+        with pytest.raises(TypeCheckError):
+            check("a", int)
+
+
+class TestParallel:
+    typ = typing.List[typing.Dict[str, typing.List[float]]]
+
+    @pytest.fixture
+    def thread_checker(self):
+        with ThreadPoolExecutor(4) as executor:
+            yield ValueChecker(executor=executor, parallel_threshold=10)
+
+    def test_matches_serial(self, thread_checker):
+        values = [{"a": [1.0, 2.0]} for _ in range(100)]
+        values[13] = {"a": [1.0, "x"]}
+        values[77] = {1: [1.0]}
+        values[90] = []
+        serial = ValueChecker()(values, self.typ)
+        parallel = thread_checker(values, self.typ)
+        assert not parallel
+        assert parallel.failures == serial.failures
+        assert [f.path for f in parallel.failures] == [(13, "a", 1), (77, 1), (90,)]
+        assert thread_checker(values[:13], self.typ)
+
+    @pytest.mark.parametrize(
+        "values,typ",
+        [
+            (tuple(range(100)), typing.Tuple[int, ...]),
+            ({str(i): i for i in range(100)}, typing.Dict[str, int]),
+            (list(range(100)), typing.List[int]),
+        ],
+    )
+    def test_containers(self, thread_checker, values, typ):
+        assert thread_checker(values, typ)
+        assert thread_checker.workers == 4
+
+    def test_dict_failures(self, thread_checker):
+        values = {str(i): i for i in range(100)}
+        values["50"] = "a"
+        values[5] = 5
+        result = thread_checker(values, typing.Dict[str, int])
+        assert [f.path for f in result.failures] == [("50",), (5,)]
+
+    def test_fail_fast(self, thread_checker):
+        values = ["a"] * 100
+        result = thread_checker(values, typing.List[int], fail_fast=True)
+        assert [f.path for f in result.failures] == [(0,)]
+        result = thread_checker(values, typing.List[int], max_errors=30)
+        assert [f.path for f in result.failures] == [(i,) for i in range(30)]
+
+    def test_policy(self):
+        with ThreadPoolExecutor(2) as executor:
+            check = ValueChecker(do_raise=True, executor=executor, parallel_threshold=1)
+            with pytest.raises(TypeCheckError):
+                check([1, "a"], typing.List[int])
+
+    def test_process_pool(self):
+        check = ValueChecker(workers=2, parallel_threshold=10)
+        try:
+            values = list(range(100))
+            assert check(values, typing.List[int])
+            values[42] = "a"
+            result = check(values, typing.List[int])
+            assert [f.path for f in result.failures] == [(42,)]
+        finally:
+            check.shutdown()
+        assert check.executor is None
+
+    def test_check_after_shutdown(self):
+        check = ValueChecker(workers=2, parallel_threshold=10)
+        try:
+            assert check(list(range(100)), typing.List[int])
+            check.shutdown()
+            assert check(list(range(100)), typing.List[int])
+            assert check.executor is not None
+        finally:
+            check.shutdown()
+
+    def test_threads_use_own_plans(self, thread_checker):
+        inner = typing.Tuple[int, str, bytes, float]
+        assert thread_checker([(1, "a", b"", 1.0)] * 100, typing.List[inner])
+        assert any(key[0] == inner for key in thread_checker._plans)
+        shared = jdv_typecheck.check.checker
+        assert not any(key[0] == inner for key in shared._plans)
+
+    def test_unpicklable_annotations_are_checked_serially(self):
+        class Local(typing.TypedDict):
+            a: int
+
+        check = ValueChecker(workers=2, parallel_threshold=10)
+        try:
+            assert check([{"a": 1}] * 20, typing.List[Local])
+            assert not check([{"a": "x"}] * 20, typing.List[Local])
+        finally:
+            check.shutdown()
+
+    def test_invalid_workers(self):
+        with pytest.raises(ValueError):
+            ValueChecker(workers=0)
+
+
+class TestTypedDictSchema:
+    class Movie(typing.TypedDict, total=False):
+        title: str
+        year: int
+
+    def test_total_false(self):
+        check = ValueChecker()
+        assert check({}, self.Movie)
+        assert check({"title": "x"}, self.Movie)
+        result = check({"year": "1999"}, self.Movie)
+        assert [f.path for f in result.failures] == [("year",)]
+
+    @pytest.mark.skipif(sys.version_info < (3, 11), reason="requires Python 3.11")
+    def test_required_not_required(self):
+        class Movie(typing.TypedDict):
+            title: str
+            year: typing.NotRequired[int]
+
+        class Book(typing.TypedDict, total=False):
+            title: typing.Required[str]
+            pages: int
+
+        check = ValueChecker()
+        assert check({"title": "x"}, Movie)
+        assert not check({"title": "x", "year": "1999"}, Movie)
+        assert not check({"year": 1999}, Movie)
+        assert check({"title": "x"}, Book)
+        assert not check({"pages": 1}, Book)
+        assert not check({"title": 1}, Book)
+
+    def test_typing_extensions(self):
+        typing_extensions = pytest.importorskip("typing_extensions")
+
+        class Movie(typing_extensions.TypedDict):
+            title: str
+            year: typing_extensions.NotRequired[int]
+
+        check = ValueChecker()
+        assert check({"title": "x"}, Movie)
+        assert not check({"title": "x", "year": "1999"}, Movie)
+        assert not check({}, Movie)
+
+    def test_forward_references(self):
+        check = ValueChecker()
+        Node = typing.TypedDict("Node", {"value": "int", "tags": "typing.List[str]"})
+        assert check({"value": 1, "tags": ["a"]}, Node)
+        assert not check({"value": 1, "tags": [1]}, Node)
+
+    def test_extra_keys_allowed_by_default(self):
+        assert ValueChecker()({"title": "x", "rating": 5}, self.Movie)
+
+    def test_forbid_extra_keys(self):
+        check = ValueChecker(forbid_extra_keys=True)
+        result = check({"title": "x", "rating": 5, "cast": []}, self.Movie)
+        assert [f.path for f in result.failures] == [("rating",), ("cast",)]
+        assert "Unexpected key 'rating'" in result.msg
+        assert ValueChecker()(
+            {"title": "x", "rating": 5}, self.Movie, forbid_extra_keys=True
+        ).failures
+        assert check({"title": "x", "rating": 5}, self.Movie, forbid_extra_keys=False)
+
+    def test_forbid_extra_keys_nested(self):
+        check = ValueChecker(forbid_extra_keys=True, fail_fast=True)
+        result = check(
+            [{"title": "x"}, {"title": "y", "z": 1}], typing.List[self.Movie]
+        )
+        assert [f.path for f in result.failures] == [(1, "z")]
+
+    def test_missing_keys_in_declaration_order(self):
+        class Point(typing.TypedDict):
+            x: int
+            y: int
+            z: int
+
+        result = ValueChecker()({"y": "a"}, Point)
+        assert [f.path for f in result.failures] == [("x",), ("z",), ("y",)]
+
+
+class TestObjects:
+    @dataclasses.dataclass
+    class Point:
+        x: int
+        y: int
+        label: Optional[str] = None
+
+    class Pair(NamedTuple):
+        key: str
+        value: typing.List[int]
+
+    def test_dataclass(self):
+        check = ValueChecker()
+        assert check(self.Point(1, 2), self.Point)
+        result = check(self.Point(1, "2", label=3), self.Point)
+        assert [f.path for f in result.failures] == [("y",), ("label",)]
+        assert "TypeError on attribute 'y'" in result.msg
+        assert not check({"x": 1, "y": 2}, self.Point)
+
+    def test_dataclass_variants(self):
+        @dataclasses.dataclass(frozen=True)
+        class Frozen:
+            x: int
+
+        @dataclasses.dataclass
+        class Child(self.Point):
+            z: str = "a"
+
+        @dataclasses.dataclass
+        class Lazy:
+            x: int
+            y: int = dataclasses.field(init=False)
+
+        check = ValueChecker()
+        assert not check(Frozen("a"), Frozen)
+        assert check(Child(1, 2), Child)
+        assert not check(Child("1", 2), Child)
+        assert not check(Child(1, 2, z=3), Child)
+        assert check(Lazy(1), Lazy)
+        lazy = Lazy(1)
+        lazy.y = "a"
+        assert not check(lazy, Lazy)
+
+    def test_named_tuple(self):
+        check = ValueChecker()
+        assert check(self.Pair("a", [1]), self.Pair)
+        result = check(self.Pair("a", [1, "b"]), self.Pair)
+        assert [f.path for f in result.failures] == [("value", 1)]
+        assert not check(("a", [1]), self.Pair)
+
+    def test_untyped_namedtuple(self):
+        Pair = collections.namedtuple("Pair", ["key", "value"])
+        assert ValueChecker()(Pair(1, 2), Pair)
+
+    def test_attrs(self):
+        attr = pytest.importorskip("attr")
+
+        @attr.s(auto_attribs=True)
+        class Point:
+            x: int
+            y: typing.List[int]
+
+        @attr.s
+        class Untyped:
+            x = attr.ib()
+
+        check = ValueChecker()
+        assert check(Point(1, [2]), Point)
+        result = check(Point(1, ["2"]), Point)
+        assert [f.path for f in result.failures] == [("y", 0)]
+        assert check(Untyped("anything"), Untyped)
+
+    def test_recursive(self):
+        check = ValueChecker()
+        tree = TreeNode(1, [TreeNode(2), TreeNode(3, [TreeNode(4)])])
+        assert check(tree, TreeNode)
+        tree.children[1].children[0].value = "4"
+        result = check(tree, TreeNode)
+        assert [f.path for f in result.failures] == [
+            ("children", 1, "children", 0, "value")
+        ]
+
+    def test_unresolvable_annotations_are_skipped(self):
+        @dataclasses.dataclass
+        class Forward:
+            x: "Undefined"  # noqa: F821
+            y: int
+
+        check = ValueChecker()
+        assert check(Forward("anything", 1), Forward)
+        assert not check(Forward("anything", "1"), Forward)
+
+    def test_fields_resolved_once(self, monkeypatch):
+        calls = []
+        get_type_hints = typing.get_type_hints
+
+        def counting(*args, **kwargs):
+            calls.append(args)
+            return get_type_hints(*args, **kwargs)
+
+        monkeypatch.setattr(typing, "get_type_hints", counting)
+        check = ValueChecker(fail_fast=True)
+        records = [self.Point(i, i) for i in range(1000)]
+        assert check(records, typing.List[self.Point])
+        assert check(records, typing.List[self.Point])
+        assert len(calls) == 1
+
+    def test_validate_args(self):
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        def bar(p: TestObjects.Point):
+            ...
+
+        bar(self.Point(1, 2))
+        with pytest.raises(TypeCheckError):
+            bar(self.Point(1, "2"))
+
+
+class TestAbstractCollections:
+    @pytest.mark.parametrize(
+        "valid,invalid,typ",
+        [
+            ({1, 2}, {1, "2"}, typing.Set[int]),
+            (frozenset(["a"]), frozenset([1]), typing.FrozenSet[str]),
+            ({1, 2}, [1, 2], typing.Set[int]),
+            ({1, 2}, {"a"}, typing.AbstractSet[int]),
+            (frozenset([1]), frozenset(["a"]), typing.AbstractSet[int]),
+            ({1}, frozenset([1]), typing.MutableSet[int]),
+            ({"a": 1}, {"a": "1"}, typing.Mapping[str, int]),
+            ({"a": 1}, {1: 1}, typing.MutableMapping[str, int]),
+            ({"a": 1}.keys(), {1: 1}.keys(), typing.KeysView[str]),
+            ({"a": 1}.values(), {1: "a"}.values(), typing.ValuesView[int]),
+            (
+                collections.OrderedDict(a=1),
+                collections.OrderedDict(a="1"),
+                typing.OrderedDict[str, int],
+            ),
+            (
+                collections.defaultdict(list, a=[1]),
+                {"a": [1]},
+                typing.DefaultDict[str, typing.List[int]],
+            ),
+            (collections.Counter("ab"), collections.Counter([1]), typing.Counter[str]),
+            (
+                collections.ChainMap({"a": 1}),
+                collections.ChainMap({"a": 1}, {"b": "2"}),
+                typing.ChainMap[str, int],
+            ),
+            ([1.0, 2.0], [1.0, "2"], typing.Sequence[float]),
+            ((1.0,), ("1",), typing.Sequence[float]),
+            ("abc", [1], typing.Sequence[str]),
+            ([1], (1,), typing.MutableSequence[int]),
+            (collections.deque([1, 2]), collections.deque([1, "2"]), typing.Deque[int]),
+            ([1], {"a"}, typing.Collection[int]),
+            ({1: "a"}, {"a": 1}, typing.Iterable[int]),
+            (range(3), ["a"], typing.Iterable[int]),
+        ],
+    )
+    def test_abstract_collections(self, valid, invalid, typ):
+        check = ValueChecker()
+        assert check(valid, typ)
+        result = check(invalid, typ)
+        assert isinstance(result, ValidationResult)
+        assert not result
+
+    def test_mapping_failure_paths(self):
+        result = ValueChecker()(
+            collections.OrderedDict([("a", 1), ("b", "2")]), typing.Mapping[str, int]
+        )
+        assert [f.path for f in result.failures] == [("b",)]
+
+    def test_iterators_are_not_consumed(self):
+        check = ValueChecker()
+        values = iter([1, "a"])
+        assert check(values, typing.Iterable[int])
+        assert list(values) == [1, "a"]
+        generator = (x for x in [1, "a"])
+        assert check(generator, typing.Iterable[int])
+        assert check(generator, typing.Iterator[int])
+        assert list(generator) == [1, "a"]
+        assert not check([1], typing.Iterator[int])
+
+    def test_sampled_sequence_and_mapping(self):
+        check = ValueChecker(sample=True)
+        result = check(collections.deque(range(1000)), typing.Deque[int])
+        assert result and result.sampled
+        result = check(
+            collections.OrderedDict((i, i) for i in range(1000)),
+            typing.Mapping[int, int],
+        )
+        assert result and result.sampled
+
+    def test_fail_fast(self):
+        check = ValueChecker(fail_fast=True)
+        assert len(check({"a", "b", "c"}, typing.Set[int]).failures) == 1
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="requires Python 3.10")
+class TestBuiltinGenerics:
+    @pytest.mark.parametrize(
+        "valid,invalid,annotation",
+        [
+            ([1, 2], [1, "2"], "list[int]"),
+            ({"a": 1}, {"a": "1"}, "dict[str, int]"),
+            ((1, 2, 3), (1, "2"), "tuple[int, ...]"),
+            ((1, "a"), ("a", 1), "tuple[int, str]"),
+            ({1}, {"a"}, "set[int]"),
+            (frozenset([1]), frozenset(["a"]), "frozenset[int]"),
+            (None, "a", "int | None"),
+            ([1, "a"], [1.0], "list[int | str]"),
+            ({"a": [1, None]}, {"a": [1.0]}, "dict[str, list[int | None]]"),
+            ([1], {1}, "collections.abc.Sequence[int]"),
+            ({"a": 1}, {1: 1}, "collections.abc.Mapping[str, int]"),
+            (
+                collections.deque([1]),
+                collections.deque(["a"]),
+                "collections.deque[int]",
+            ),
+            (1.0, "a", "int | float"),
+        ],
+    )
+    def test_builtin_generics(self, valid, invalid, annotation):
+        typ = eval(annotation)
+        check = ValueChecker()
+        assert is_typing_type(typ)
+        assert check(valid, typ)
+        result = check(invalid, typ)
+        assert isinstance(result, ValidationResult)
+        assert not result
+
+    def test_failure_paths_match_typing(self):
+        check = ValueChecker()
+        result = check({"a": [1, "b"]}, dict[str, list[int]])
+        expected = check({"a": [1, "b"]}, typing.Dict[str, typing.List[int]])
+        assert [f.path for f in result.failures] == [f.path for f in expected.failures]
+
+    def test_plans_are_cached(self):
+        check = ValueChecker()
+        assert check.compile(list[int]) is check.compile(list[int])
+        assert check.compile(int | None) is check.compile(int | None)
+
+    def test_callable(self):
+        check = ValueChecker()
+        typ = collections.abc.Callable[[int], str]
+
+        def f(x: int) -> str:
+            pass
+
+        def g(x: str) -> str:
+            pass
+
+        assert check(f, typ)
+        assert not check(g, typ)
+
+    def test_validate_args(self):
+        @jdv_typecheck.validate_args
+        def f(x: list[int], y: int | None = None) -> dict[str, int]:
+            return {"x": len(x)}
+
+        assert f([1, 2], 3) == {"x": 2}
+        with pytest.raises(TypeCheckError):
+            f([1, "2"])
+        with pytest.raises(TypeCheckError):
+            f([1], "3")
+
+    def test_none_arguments(self):
+        check = ValueChecker()
+        assert check((1, None), tuple[int, None])
+        assert not check((1, 2), tuple[int, None])
+        assert check({"a": None}, dict[str, None])
+        assert not check({"a": 1}, dict[str, None])
+
+    def test_generator_returning_none(self):
+        def gen():
+            yield 1
+
+        typ = collections.abc.Generator[int, None, None]
+        stream = ValueChecker(do_raise=True).stream(gen(), typ)
+        assert list(stream) == [1]
+        assert stream.result
+
+        validate_args = ValueChecker(do_raise=True).validate_args(returns=True)
+
+        @validate_args
+        def f() -> collections.abc.Generator[int, None, None]:
+            yield 1
+
+        assert list(f()) == [1]
+
+
+class TestUnionDispatch:
+    wide = typing.Union[
+        None,
+        int,
+        str,
+        float,
+        typing.List[int],
+        typing.Dict[str, typing.Any],
+        typing.Tuple[int, ...],
+    ]
+
+    @pytest.mark.parametrize("value", [None, 1, "a", 1.0, [1, 2], {"a": [1]}, (1, 2)])
+    def test_wide_union_valid(self, value):
+        assert ValueChecker()(value, self.wide)
+
+    @pytest.mark.parametrize("value", [b"a", [1, "2"], {1: 1}, (1, "2"), {1}])
+    def test_wide_union_invalid(self, value):
+        result = ValueChecker()(value, self.wide)
+        assert not result
+        assert len(result.failures) == 1
+        assert result.msg.startswith(f"Value {value} did not pass")
+
+    def test_object_members(self):
+        Point = typing.TypedDict("Point", {"x": int, "y": int})
+        typ = typing.Union[TreeNode, Point, None]
+        check = ValueChecker()
+        assert check(TreeNode(1), typ)
+        assert not check(TreeNode("1"), typ)
+        assert check({"x": 1, "y": 2}, typ)
+        assert not check({"x": 1}, typ)
+
+    def test_only_matching_branches_are_tried(self):
+        check = ValueChecker()
+        plan = check.compile(typing.Union[int, typing.List[str], typing.Set[int]])
+        assert plan({1})
+        assert not plan({"a"})
+        assert plan(["a"])
+        assert not plan([1])
+
+    def test_subclasses(self):
+        class MyList(list):
+            pass
+
+        class MyInt(int):
+            pass
+
+        typ = typing.Union[str, typing.List[int]]
+        check = ValueChecker()
+        assert check(MyList([1]), typ)
+        assert not check(MyList(["a"]), typ)
+        assert check(MyInt(1), typing.Union[int, str])
+
+    @pytest.mark.skipif(sys.version_info < (3, 9), reason="requires Python 3.9")
+    def test_builtin_generic_members(self):
+        check = ValueChecker()
+        assert check([1], Optional[eval("list[int]")])
+        assert not check(["a"], Optional[eval("list[int]")])
+        assert check({"a": 1}, typing.Union[None, eval("dict[str, int]")])
+        assert not check({"a": "1"}, typing.Union[None, eval("dict[str, int]")])
+        assert check([1], typing.Union[int, eval("list[int]")])
+        assert check([[1]], typing.List[typing.Union[int, eval("list[int]")]])
+
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="requires Python 3.10")
+    def test_builtin_union_members(self):
+        check = ValueChecker()
+        assert check([1], eval("int | list[int]"))
+        assert not check(["a"], eval("int | list[int]"))
+
+    @pytest.mark.skipif(sys.version_info < (3, 8), reason="requires Protocol")
+    def test_non_runtime_protocol(self):
+        class Proto(typing.Protocol):
+            def method(self):
+                ...
+
+        check = ValueChecker()
+        assert check(1, typing.Union[Proto, int])
+        assert not check("a", typing.Union[Proto, int])
+
+
+class TestLeafDispatch:
+    @pytest.mark.parametrize(
+        "value,typ",
+        [
+            (list(range(100)), typing.List[int]),
+            (tuple(range(100)), typing.Tuple[int, ...]),
+            (set(range(100)), typing.Set[int]),
+            (frozenset(range(100)), typing.FrozenSet[int]),
+            (collections.deque(range(100)), typing.Deque[int]),
+            ([True, 1], typing.List[int]),
+            ([1, "a", None], typing.List[typing.Union[int, str, None]]),
+            ([], typing.List[int]),
+        ],
+    )
+    def test_bulk_valid(self, value, typ):
+        assert ValueChecker()(value, typ)
+
+    def test_bulk_failures_are_reported_per_element(self):
+        check = ValueChecker()
+        result = check([1, "a", 2, 3.0], typing.List[int])
+        assert [f.path for f in result.failures] == [(1,), (3,)]
+        result = check([1, 2.0], typing.List[typing.Union[int, str]])
+        assert [f.path for f in result.failures] == [(1,)]
+
+    def test_subclass_elements(self):
+        class MyInt(int):
+            pass
+
+        check = ValueChecker()
+        assert check(MyInt(1), int)
+        assert check([MyInt(1), 2], typing.List[int])
+        assert not check([MyInt(1), "2"], typing.List[int])
+
+    @pytest.fixture
+    def scanned(self, monkeypatch):
+        """Record the length of the containers scanned by bulk checks."""
+        scanned = []
+        compile_all_leaves = ValueChecker._compile_all_leaves
+
+        def recording(self, inner_typ, options):
+            all_leaves = compile_all_leaves(self, inner_typ, options)
+            if all_leaves is None:
+                return None
+
+            def scan(obj):
+                scanned.append(len(obj))
+                return all_leaves(obj)
+
+            return scan
+
+        monkeypatch.setattr(ValueChecker, "_compile_all_leaves", recording)
+        return scanned
+
+    def test_max_errors_skips_bulk_pass(self, scanned):
+        values = ["a"] + list(range(100_000))
+        assert not ValueChecker(fail_fast=True)(values, typing.List[int])
+        assert not ValueChecker(max_errors=2)(set(values), typing.Set[int])
+        assert scanned == []
+        assert not ValueChecker()(values, typing.List[int])
+        assert scanned == [len(values)]
+
+    def test_probes_keep_bulk_pass(self, scanned):
+        values = list(range(1000))
+        assert ValueChecker()(values, typing.Optional[typing.List[int]])
+        assert scanned == [len(values)]
+
+        check = ValueChecker(do_raise=True)
+
+        @check.validate_args
+        def foo(a: typing.List[int]):
+            ...
+
+        foo(values)
+        assert scanned == [len(values)] * 2
+        check = ValueChecker(do_raise=True, fail_fast=True)
+
+        @check.validate_args
+        def bar(a: typing.List[int]):
+            ...
+
+        bar(values)
+        assert not ValueChecker(fail_fast=True)(
+            ["a"] + values, typing.Optional[typing.List[int]]
+        )
+        assert scanned == [len(values)] * 2
+
+    def test_custom_metaclass_elements(self):
+        class Color(Enum):
+            RED = 1
+
+        check = ValueChecker()
+        assert check([Color.RED], typing.List[Color])
+        assert not check([1], typing.List[Color])
+        assert check([[1]], typing.List[typing.Sequence[int]])
+        assert not check([{1}], typing.List[typing.Sequence[int]])
+
+
+class TestProfile:
+    def test_disabled_by_default(self):
+        check = ValueChecker()
+        check([1, 2], typing.List[int])
+        assert check.profile_stats() == {"annotations": {}, "functions": {}}
+
+    def test_annotations(self):
+        check = ValueChecker(profile=True)
+        check([1, 2, 3], typing.List[int])
+        check([1, "a"], typing.List[int])
+        check(1, int)
+        stats = check.profile_stats()["annotations"]
+        assert stats["typing.List[int]"]["calls"] == 2
+        assert stats["typing.List[int]"]["values"] == 5
+        assert stats["typing.List[int]"]["failures"] == 1
+        assert stats["typing.List[int]"]["time"] > 0
+        assert stats[str(int)] == dict(
+            calls=1, time=stats[str(int)]["time"], values=1, failures=0
+        )
+
+    def test_functions(self):
+        check = ValueChecker(do_raise=True, profile=True, check_returns=True)
+
+        @check.validate_args
+        def f(x: int, *args: int, y: str = "a") -> int:
+            return x
+
+        f(1, 2, 3, y="b")
+        f(2)
+        with pytest.raises(TypeCheckError):
+            f("a")
+        stats = check.profile_stats()["functions"]
+        assert list(stats) == [f"{__name__}.{f.__qualname__}"]
+        entry = stats[f"{__name__}.{f.__qualname__}"]
+        assert entry["calls"] == 3
+        assert entry["values"] == 4 + 1 + 1 + 2
+        assert entry["failures"] == 1
+        assert entry["time"] > 0
+
+    def test_toggle_and_clear(self):
+        check = ValueChecker()
+
+        @check.validate_args
+        def f(x: int):
+            return x
+
+        f(1)
+        check.profile = True
+        f(1)
+        check(1, int)
+        stats = check.profile_stats()
+        assert stats["functions"][f"{__name__}.{f.__qualname__}"]["calls"] == 1
+        assert stats["annotations"][str(int)]["calls"] == 1
+        check.profile_clear()
+        assert check.profile_stats() == {"annotations": {}, "functions": {}}
+
+    @pytest.mark.skipif(sys.version_info < (3, 9), reason="requires Annotated")
+    def test_unhashable_annotation(self):
+        check = ValueChecker(profile=True)
+        typ = typing.Annotated[int, []]
+        check(1, typ)
+        assert str(typ) in check.profile_stats()["annotations"]
+
+    def test_dump(self, tmp_path):
+        import json
+
+        check = ValueChecker(profile=True)
+        check([1], typing.List[int])
+        path = tmp_path / "profile.json"
+        with open(path, "w") as f:
+            dumped = check.profile_dump(f, indent=2)
+        assert json.loads(path.read_text()) == json.loads(dumped)
+        assert json.loads(dumped) == check.profile_stats()
+
+
+class TestCheckMany:
+    def test_leaf_values(self):
+        class MyInt(int):
+            pass
+
+        values = [1, "a", True, MyInt(2), None, 3.0]
+        result = ValueChecker().check_many(values, int)
+        assert isinstance(result, jdv_typecheck.BatchResult)
+        assert result.mask == bytearray([1, 0, 1, 1, 0, 0])
+        assert result.indices == [1, 4, 5]
+        assert not result
+        assert len(result) == 6
+        assert list(result.select(values)) == [1, True, MyInt(2)]
+
+    def test_union_of_leaves(self):
+        result = ValueChecker().check_many([1, None, "a"], Optional[int])
+        assert result.mask == bytearray([1, 1, 0])
+
+    def test_containers(self):
+        values = [{"a": 1}, {"a": "1", "b": "2"}, {}]
+        result = ValueChecker().check_many(values, typing.Dict[str, int])
+        assert result.mask == bytearray([1, 0, 1])
+        invalid = result.result(1)
+        assert [f.path for f in invalid.failures] == [(1, "a"), (1, "b")]
+        assert result.result(0) is not invalid and result.result(0)
+        with pytest.raises(IndexError):
+            result.result(3)
+
+    def test_fail_fast(self):
+        values = [["a", "b"]]
+        result = ValueChecker().check_many(values, typing.List[int], fail_fast=True)
+        assert len(result.result(0).failures) == 1
+
+    def test_streams_in_chunks(self):
+        n = jdv_typecheck.check._BATCH_CHUNK_SIZE * 2 + 3
+        values = (i if i % 1000 else str(i) for i in range(n))
+        result = ValueChecker().check_many(values, int)
+        assert len(result) == n
+        assert result.indices == list(range(0, n, 1000))
+
+    def test_messages(self):
+        result = ValueChecker().check_many([1, "a"], int, extra_err_msg="Bad row.")
+        ((index, msg),) = result.messages()
+        assert index == 1
+        assert "Bad row." in msg and "'a'" in msg
+
+    def test_empty_and_valid(self):
+        check = ValueChecker(do_raise=True)
+        assert check.check_many([], int)
+        result = check.check_many(range(5), typing.Any)
+        assert result and result.mask == bytearray([1] * 5)
+
+    def test_profile(self):
+        check = ValueChecker(profile=True)
+        check.check_many([1, "a", 2], int)
+        stats = check.profile_stats()["annotations"][str(int)]
+        assert stats["calls"] == 1
+        assert stats["values"] == 3
+        assert stats["failures"] == 1